@@ -1,11 +1,16 @@
 import logging
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 from datetime import datetime
+import io
 import json
 import os
 from utils.data_generator import generate_resource_data, generate_alert_data
-from utils.ml_predictor import DisasterPredictor
+from utils.model_server import get_model_server
 from utils.sms_handler import SMSHandler
+from utils.sms_dispatcher import SMSDispatcher, FakeGateway
+from utils.alert_store import AlertStore
+from utils.sqlite_store import get_store
+from utils.confirmations import ConfirmationIngestor, phone_key
 import pandas as pd
 import uuid
 
@@ -27,36 +32,110 @@ for directory in ['data', 'models', 'templates/errors']:
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
+app.config['MAX_BATCH_ROWS'] = int(os.environ.get('MAX_BATCH_ROWS', 100000))
+app.config['MAX_ALERTS_LIMIT'] = int(os.environ.get('MAX_ALERTS_LIMIT', 1000))
+
+# Training and simulation workers re-import this module as __mp_main__;
+# they only need the job functions, so they must not open the store or
+# start a model server, SMS handler or dispatcher of their own
+WORKER_PROCESS = __name__ == '__mp_main__'
+
+# Initialize the shared model server; a missing or stale model is trained
+# in a background process so startup is not blocked
+model_server = None
+if not WORKER_PROCESS:
+    try:
+        logger.info("Initializing model server...")
+        model_server = get_model_server(background=True)
+        logger.info(f"Model server initialized (ready: {model_server.ready})")
+    except Exception as e:
+        logger.error(f"Failed to initialize model server: {str(e)}", exc_info=True)
 
-# Initialize predictor
-try:
-    logger.info("Initializing DisasterPredictor...")
-    predictor = DisasterPredictor()
-    if predictor.model is None:
-        logger.info("No existing model found. Generating and training with sample data...")
-        X, y = predictor.generate_sample_data()
-        predictor.train(X, y)
-    logger.info("DisasterPredictor initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize DisasterPredictor: {str(e)}", exc_info=True)
-    predictor = None
-
-# Initialize SMS handler
-try:
-    logger.info("Initializing SMSHandler...")
-    sms_handler = SMSHandler()
-    logger.info("SMSHandler initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize SMSHandler: {str(e)}", exc_info=True)
-    sms_handler = None
+def current_predictor():
+    """The predictor serving this request, or None if no model is available yet"""
+    return model_server.predictor if model_server else None
 
 class SessionData:
+    """Alert, evacuation and resource state
+
+    Backed by SQLite (ALERT_DB_PATH) so it survives restarts and is shared by
+    every worker process and the Streamlit pages; ALERT_STORE=memory keeps
+    it in-process instead.
+    """
+
     def __init__(self):
-        self.alerts = []
-        self.resources = generate_resource_data()
-        self.evacuation_data = {}
+        if os.environ.get('ALERT_STORE', 'sqlite') == 'memory':
+            self.store = None
+            self.alerts = AlertStore()
+            self._resources = generate_resource_data()
+            self._evacuation_data = {}
+        else:
+            self.store = get_store()
+            self.alerts = self.store
+
+    @property
+    def resources(self):
+        return self.store.resources() if self.store is not None else self._resources
+
+    @property
+    def evacuation_data(self):
+        if self.store is not None:
+            return self.store.evacuation_data()
+        # In memory the alert's de-duplicated confirmations are the evacuation count
+        return {
+            alert_id: {**data, 'confirmed': min(data['total'], self.alerts.get(alert_id)['confirmed_safe'])}
+            for alert_id, data in self._evacuation_data.items()
+        }
+
+    def track_evacuation(self, alert):
+        """Start evacuation tracking for an alert sent to its recipients"""
+        data = {
+            'location': alert['location'],
+            'severity': alert['severity'],
+            'message': alert['message'],
+            'timestamp': alert['timestamp'],
+            'total': alert['recipients'],
+            'confirmed': 0
+        }
+        if self.store is not None:
+            self.store.upsert_evacuation(alert['id'], data)
+        else:
+            self._evacuation_data[alert['id']] = data
+
+session_data = None
+confirmation_ingestor = None
+if not WORKER_PROCESS:
+    session_data = SessionData()
+    confirmation_ingestor = ConfirmationIngestor(session_data.alerts)
+
+# Initialize SMS handler
+sms_handler = None
+if not WORKER_PROCESS:
+    try:
+        logger.info("Initializing SMSHandler...")
+        sms_handler = SMSHandler(store=session_data.alerts)
+        logger.info("SMSHandler initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize SMSHandler: {str(e)}", exc_info=True)
 
-session_data = SessionData()
+# Start the background SMS dispatcher so alerts never block the request path
+# (set SMS_GATEWAY=fake to load-test against FakeGateway instead of SMSHandler)
+sms_dispatcher = None
+if not WORKER_PROCESS and (sms_handler or os.environ.get('SMS_GATEWAY') == 'fake'):
+    try:
+        if os.environ.get('SMS_GATEWAY') == 'fake':
+            send_fn = FakeGateway(latency=float(os.environ.get('SMS_FAKE_LATENCY', 0.05))).send_alert
+        else:
+            send_fn = lambda to_number, message, alert_id: sms_handler.send_alert(
+                to_number=to_number, message=message, alert_id=alert_id
+            )
+        sms_dispatcher = SMSDispatcher(
+            send_fn=send_fn,
+            workers=int(os.environ.get('SMS_WORKERS', 8)),
+            queue_size=int(os.environ.get('SMS_QUEUE_SIZE', 10000))
+        ).start()
+    except Exception as e:
+        logger.error(f"Failed to start SMSDispatcher: {str(e)}", exc_info=True)
 
 @app.route('/')
 def index():
@@ -71,6 +150,7 @@ def index():
 def predictions():
     try:
         logger.info("Rendering predictions page")
+        predictor = current_predictor()
         if predictor is None or predictor.model is None:
             return render_template('predictions.html', error="ML Predictor not available")
         return render_template('predictions.html')
@@ -81,20 +161,16 @@ def predictions():
 @app.route('/api/predict', methods=['POST'])
 def predict():
     try:
+        predictor = current_predictor()
         if predictor is None or predictor.model is None:
             raise ValueError("ML Predictor not initialized")
 
         data = request.json
         logger.info(f"Prediction request data: {data}")
 
-        input_data = pd.DataFrame({
-            'rainfall': [float(data['rainfall'])],
-            'temperature': [float(data['temperature'])],
-            'seismic_activity': [float(data['seismic_activity'])],
-            'wind_speed': [float(data['wind_speed'])]
-        })
+        input_data = pd.DataFrame({column: [float(data[column])] for column in predictor.feature_columns})
 
-        result = predictor.predict(input_data)
+        result = model_server.predict(input_data)
         logger.info(f"Prediction result: {result}")
 
         # Check for high-risk predictions (probability > 0.7)
@@ -103,7 +179,6 @@ def predict():
         message_ids = []  # Track message IDs for display
 
         if high_risk_disasters:
-            alert_id = str(uuid.uuid4())
             location = data['location']
 
             # Phone numbers for testing
@@ -116,6 +191,7 @@ def predict():
 
             if location in phone_numbers:
                 for disaster, probability in high_risk_disasters.items():
+                    alert_id = str(uuid.uuid4())  # One alert (and ID) per disaster
                     alert_message = (
                         f"🚨 EMERGENCY ALERT: {probability:.1%} risk of {disaster.upper()} "
                         f"predicted in {location}!\n"
@@ -138,30 +214,28 @@ def predict():
                         'recipients': len(phone_numbers[location]),
                         'confirmed_safe': 0
                     }
-                    session_data.alerts.append(alert)
+                    session_data.alerts.add(alert)
+                    session_data.track_evacuation(alert)
+                    # Lets a bare "YES" reply from any of these numbers resolve to this alert
+                    session_data.alerts.record_recipients(
+                        alert_id, [phone_key(number) for number in phone_numbers[location]]
+                    )
                     alerts_info.append(alert)
 
-                    # Send SMS to all numbers in the location
-                    if sms_handler:
-                        for phone_number in phone_numbers[location]:
-                            try:
-                                message_id = sms_handler.send_alert(
-                                    to_number=phone_number,
-                                    message=alert_message,
-                                    alert_id=alert_id
-                                )
-                                message_ids.append(message_id)  # Store message ID
-                                logger.info(f"Alert SMS sent to {phone_number}, Message ID: {message_id}")
-                            except Exception as e:
-                                logger.error(f"Error sending alert to {phone_number}: {str(e)}")
-                                message_ids.append(None)  # Add None for failed messages
+                    # Queue SMS for all numbers in the location; delivery happens in the background
+                    if sms_dispatcher:
+                        queued_ids = sms_dispatcher.enqueue_many(
+                            phone_numbers[location], alert_message, alert_id
+                        )
+                        message_ids.extend(queued_ids)  # Store message IDs
+                        logger.info(f"Queued {len(queued_ids)} alert SMS for {location}")
 
         return jsonify({
             'success': True,
             'predictions': result,
             'alerts_sent': bool(high_risk_disasters),
             'alerts_info': alerts_info,
-            'message_ids': message_ids  # Include message IDs in response
+            'message_ids': message_ids  # Queued message IDs, see /api/sms/status
         })
     except Exception as e:
         logger.error(f"Error in predict route: {str(e)}", exc_info=True)
@@ -170,21 +244,206 @@ def predict():
             'error': str(e)
         }), 400
 
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score many readings in one request
+
+    Accepts either a CSV body (text/csv) with the feature columns, or JSON
+    shaped as {"readings": [...]} where each reading is an object keyed by
+    feature name or a list in feature order. Add ?format=csv to get CSV back.
+    """
+    try:
+        predictor = current_predictor()
+        if predictor is None or predictor.model is None:
+            raise ValueError("ML Predictor not initialized")
+
+        if request.mimetype == 'text/csv':
+            readings = pd.read_csv(io.BytesIO(request.get_data()))
+        else:
+            data = request.get_json(force=True)
+            records = data.get('readings', []) if isinstance(data, dict) else data
+            if records and isinstance(records[0], dict):
+                readings = pd.DataFrame.from_records(records)
+            else:
+                readings = pd.DataFrame(records, columns=predictor.feature_columns)
+
+        if len(readings) == 0:
+            raise ValueError("No readings provided")
+        if len(readings) > app.config['MAX_BATCH_ROWS']:
+            raise ValueError(f"Batch exceeds {app.config['MAX_BATCH_ROWS']} readings")
+
+        probabilities, labels = predictor.predict_batch(readings)
+        logger.info(f"Scored batch of {len(readings)} readings")
+
+        if request.args.get('format') == 'csv':
+            result = pd.DataFrame(probabilities, columns=predictor.disaster_types)
+            result.insert(0, 'predicted', labels)
+            return Response(result.to_csv(index=False), mimetype='text/csv')
+
+        return jsonify({
+            'success': True,
+            'count': len(readings),
+            'disaster_types': predictor.disaster_types,
+            'probabilities': probabilities.tolist(),
+            'labels': labels.tolist()
+        })
+    except Exception as e:
+        logger.error(f"Error in predict batch route: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/model/retrain', methods=['POST'])
+def model_retrain():
+    """Start a background retraining job
+
+    With a CSV body (text/csv, feature columns plus disaster_type) the model
+    is retrained on that data, otherwise on the default training data.
+    """
+    try:
+        if model_server is None:
+            raise ValueError("Model server not available")
+
+        X = y = None
+        if request.mimetype == 'text/csv':
+            predictor = current_predictor()
+            if predictor is None:
+                raise ValueError("Model is still training")
+            data = pd.read_csv(io.BytesIO(request.get_data()))
+            X = data[predictor.feature_columns]
+            y = data['disaster_type']
+
+        job_id = model_server.submit_retrain(X, y)
+        return jsonify({'success': True, 'job_id': job_id}), 202
+    except Exception as e:
+        logger.error(f"Error in model retrain route: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/model/update', methods=['POST'])
+def model_update():
+    """Incrementally update the served model with newly labeled observations
+
+    Accepts a CSV body (text/csv) or JSON {"observations": [...], "trees": 20},
+    each observation holding the feature values plus disaster_type. Without
+    trees the number of new trees is scaled to the batch size.
+    """
+    try:
+        if model_server is None:
+            raise ValueError("Model server not available")
+
+        n_trees = request.args.get('trees', type=int)
+        if request.mimetype == 'text/csv':
+            data = pd.read_csv(io.BytesIO(request.get_data()))
+        else:
+            body = request.get_json(force=True)
+            data = pd.DataFrame(body.get('observations', []))
+            n_trees = body.get('trees', n_trees)
+            n_trees = None if n_trees is None else int(n_trees)
+        if data.empty:
+            raise ValueError("No observations provided")
+
+        metrics = model_server.update(data, data['disaster_type'], n_trees=n_trees)
+        return jsonify({'success': True, **metrics})
+    except Exception as e:
+        logger.error(f"Error in model update route: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/model/status')
+def model_status():
+    if model_server is None:
+        return jsonify({'success': False, 'error': 'Model server not available'}), 503
+    return jsonify({'success': True, **model_server.status()})
+
+@app.route('/api/model/jobs/<job_id>')
+def model_job(job_id):
+    if model_server is None:
+        return jsonify({'success': False, 'error': 'Model server not available'}), 503
+    job = model_server.job_status(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f"Job {job_id} not found"}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/api/sms/status/<message_id>')
+def sms_status(message_id):
+    if sms_dispatcher is None:
+        return jsonify({'success': False, 'error': 'SMS dispatcher not available'}), 503
+    status = sms_dispatcher.get_status(message_id)
+    if status is None:
+        return jsonify({'success': False, 'error': f"Message {message_id} not found"}), 404
+    return jsonify({'success': True, 'status': status})
+
+@app.route('/api/sms/inbound', methods=['POST'])
+def sms_inbound():
+    """Ingest inbound SMS replies and record the safety confirmations
+
+    Accepts JSONL (one {"from", "body"} event per line, e.g. a webhook dump)
+    or JSON as a list of events / {"messages": [...]}.
+    """
+    try:
+        if sms_handler is None:
+            raise ValueError("SMS handler not available")
+
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            results = sms_handler.process_jsonl(request.get_data().splitlines())
+        else:
+            data = request.get_json(force=True)
+            messages = data.get('messages', []) if isinstance(data, dict) else data
+            results = sms_handler.process_responses(messages)
+
+        confirmations = []
+        rejected = 0
+        for result in results:
+            if result['success']:
+                confirmations.append(result)
+            else:
+                rejected += 1
+
+        ingested = confirmation_ingestor.ingest(confirmations)
+        return jsonify({
+            'success': True,
+            'received': len(confirmations) + rejected,
+            'not_confirmations': rejected,
+            **ingested
+        })
+    except Exception as e:
+        logger.error(f"Error in sms inbound route: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/sms/stats')
+def sms_stats():
+    if sms_dispatcher is None:
+        return jsonify({'success': False, 'error': 'SMS dispatcher not available'}), 503
+    return jsonify({'success': True, 'stats': sms_dispatcher.stats()})
+
 @app.route('/alerts')
 def alerts():
     try:
         logger.info("Rendering alerts page")
-        # Calculate confirmation statistics
-        for alert in session_data.alerts:
-            if 'confirmation_stats' not in alert:
-                alert['confirmation_stats'] = {
-                    'total_sent': alert.get('recipients', 0),
-                    'confirmed': alert.get('confirmed_safe', 0),
-                    'pending': alert.get('recipients', 0) - alert.get('confirmed_safe', 0)
-                }
+        # Confirmation stats are maintained by the store; only filter and page here
+        location = request.args.get('location')
+        disaster_type = request.args.get('disaster_type')
+        if location:
+            alerts_list = session_data.alerts.by_location(location)
+        elif disaster_type:
+            alerts_list = session_data.alerts.by_disaster_type(disaster_type)
+        else:
+            # A malformed limit falls back to the default; large ones are capped
+            limit = request.args.get('limit', 100, type=int)
+            alerts_list = session_data.alerts.recent(min(limit, app.config['MAX_ALERTS_LIMIT']))
 
         return render_template('alerts.html', 
-                             alerts=session_data.alerts,
+                             alerts=alerts_list,
+                             totals=session_data.alerts.totals(),
                              evacuation_data=session_data.evacuation_data)
     except Exception as e:
         logger.error(f"Error in alerts route: {str(e)}", exc_info=True)
@@ -192,38 +451,41 @@ def alerts():
 
 @app.route('/api/confirm-safe', methods=['POST'])
 def confirm_safe():
+    """Record safety confirmations
+
+    Accepts a single {"alert_id", "phone_number"} object or a batch as
+    {"confirmations": [...]}. Each phone number counts once per alert, so
+    retries and duplicate replies are safe to resend.
+    """
     try:
         data = request.json
+
+        if 'confirmations' in data:
+            result = confirmation_ingestor.ingest(data['confirmations'])
+            return jsonify({
+                'success': True,
+                'message': 'Safety confirmations recorded',
+                **result
+            })
+
         alert_id = data.get('alert_id')
         phone_number = data.get('phone_number')
 
         logger.info(f"Received safety confirmation for alert {alert_id} from {phone_number}")
 
-        # Find and update the alert
-        for alert in session_data.alerts:
-            if alert['id'] == alert_id:
-                alert['confirmed_safe'] = alert.get('confirmed_safe', 0) + 1
-                alert['confirmation_stats'] = {
-                    'total_sent': alert.get('recipients', 0),
-                    'confirmed': alert['confirmed_safe'],
-                    'pending': alert.get('recipients', 0) - alert['confirmed_safe']
-                }
-                logger.info(f"Updated confirmation count for alert {alert_id}: {alert['confirmed_safe']}")
-
-                # Simulate random confirmations for demo purposes
-                if alert['confirmed_safe'] == 1:  # First real confirmation triggers simulation
-                    for sim_phone in ['+919742342120', '+916362171135']:
-                        if sim_phone != phone_number:  # Don't simulate for the actual confirming number
-                            alert['confirmed_safe'] += 1
-                            logger.info(f"Simulated confirmation from {sim_phone}")
-
-                return jsonify({
-                    'success': True,
-                    'message': 'Safety confirmation recorded',
-                    'alert': alert
-                })
-
-        raise ValueError(f"Alert {alert_id} not found")
+        if alert_id not in session_data.alerts:
+            raise ValueError(f"Alert {alert_id} not found")
+
+        is_new = confirmation_ingestor.ingest_one(alert_id, phone_number)
+        alert = session_data.alerts.get(alert_id)
+        logger.info(f"Confirmation count for alert {alert_id}: {alert['confirmed_safe']} (new: {is_new})")
+
+        return jsonify({
+            'success': True,
+            'message': 'Safety confirmation recorded' if is_new else 'Safety confirmation already recorded',
+            'duplicate': not is_new,
+            'alert': alert
+        })
 
     except Exception as e:
         logger.error(f"Error in confirm-safe route: {str(e)}")
@@ -2,8 +2,10 @@ import streamlit as st
 import plotly.express as px
 import numpy as np
 import pandas as pd
-from utils.data_generator import generate_disaster_data, generate_resource_data, generate_alert_data
-from utils.ml_predictor import DisasterPredictor  # Changed import to use proper ML predictor
+from utils.data_generator import generate_disaster_data, generate_alert_data
+from utils.mock_ml import DisasterPredictor as MockPredictor
+from utils.model_server import get_model_server
+from utils.sqlite_store import get_store
 
 # Page configuration
 st.set_page_config(
@@ -19,11 +21,12 @@ with open('assets/custom.css') as f:
 # Header
 st.title("🚨 Disaster Management & ML Analysis Dashboard")
 
+# Inventory lives in the shared store so every page and the API see the same stock
+resources = get_store().resources()
+
 # Initialize session state
 if 'disaster_data' not in st.session_state:
     st.session_state.disaster_data = generate_disaster_data()
-if 'resource_data' not in st.session_state:
-    st.session_state.resource_data = generate_resource_data()
 if 'alert_data' not in st.session_state:
     st.session_state.alert_data = generate_alert_data()
 
@@ -36,11 +39,11 @@ with col1:
 with col2:
     st.metric("High Risk Areas", len(st.session_state.disaster_data[st.session_state.disaster_data['severity'] == 'High']))
 with col3:
-    st.metric("Available Resources", sum(st.session_state.resource_data.values()))
+    st.metric("Available Resources", sum(resources.values()))
 
 # Disaster Predictions
 st.subheader("🔮 Disaster Predictions")
-predictor = DisasterPredictor()
+model_server = get_model_server()  # Shared across reruns and sessions
 
 # Location selector
 location = st.selectbox(
@@ -48,9 +51,14 @@ location = st.selectbox(
     ["Maharashtra", "Kerala", "Gujarat", "Tamil Nadu", "West Bengal"]
 )
 
-# Get and display predictions
-predictions = predictor.predict_disasters(location)
-risk_factors = predictor.get_risk_factors(location)
+# Get and display predictions from the trained model for the current risk factors
+risk_factors = MockPredictor().get_risk_factors(location)
+predictions = model_server.predict(pd.DataFrame({
+    'rainfall': [risk_factors['Rainfall']],
+    'temperature': [risk_factors['Temperature']],
+    'seismic_activity': [risk_factors['Seismic Activity']],
+    'wind_speed': [risk_factors['Wind Speed']]
+}))
 
 col1, col2 = st.columns(2)
 
@@ -88,10 +96,10 @@ for _, alert in st.session_state.alert_data.iloc[:3].iterrows():
 # Resource Overview
 st.subheader("📦 Resource Overview")
 fig2 = px.bar(
-    x=list(st.session_state.resource_data.keys()),
-    y=list(st.session_state.resource_data.values()),
+    x=list(resources.keys()),
+    y=list(resources.values()),
     title="Available Resources",
-    color=list(st.session_state.resource_data.values()),
+    color=list(resources.values()),
     color_continuous_scale="Viridis"
 )
 fig2.update_layout(xaxis_title="Resource Type", yaxis_title="Quantity")
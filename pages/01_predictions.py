@@ -2,9 +2,11 @@ import streamlit as st
 import plotly.express as px
 import numpy as np
 import pandas as pd
-from utils.ml_predictor import DisasterPredictor
+from utils.model_server import get_model_server
 from utils.sms_handler import SMSHandler
+import hashlib
 import io
+import os
 import uuid
 from datetime import datetime
 
@@ -12,10 +14,14 @@ st.set_page_config(page_title="ML Predictions", page_icon="📊")
 
 st.title("📊 ML-Based Disaster Predictions")
 
-# Initialize predictor and SMS handler
-predictor = DisasterPredictor()
+# Shared, process-wide model (loaded once, not on every rerun or session)
+model_server = get_model_server()
+predictor = model_server.predictor
 sms_handler = SMSHandler()
 
+# Uploaded training files, named by content hash
+UPLOAD_DIR = os.path.join('data', 'uploads')
+
 # Initialize session state for alerts
 if 'alert_threshold' not in st.session_state:
     st.session_state.alert_threshold = 0.7  # 70% probability threshold for alerts
@@ -53,61 +59,64 @@ if data_source == "Upload Custom Data":
     uploaded_file = st.file_uploader("Upload your disaster data (CSV)", type=['csv'])
     if uploaded_file:
         try:
-            data = pd.read_csv(uploaded_file)
-            st.write("Data Preview:", data.head())
+            st.write("Data Preview:", pd.read_csv(uploaded_file, nrows=5))
+            uploaded_file.seek(0)
 
             if st.button("Train Model with Uploaded Data"):
-                with st.spinner("Training model..."):
-                    # Separate features and labels
-                    X = data[predictor.feature_columns]
-                    y = data['disaster_type']
-
-                    # Train the model
-                    metrics = predictor.train(X, y)
-
-                    # Display metrics
-                    st.success("Model trained successfully!")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.metric("Training Accuracy", f"{metrics['train_accuracy']:.2%}")
-                    with col2:
-                        st.metric("Test Accuracy", f"{metrics['test_accuracy']:.2%}")
-
-                    # Feature importance plot
-                    fig = px.bar(
-                        x=list(metrics['feature_importance'].keys()),
-                        y=list(metrics['feature_importance'].values()),
-                        title="Feature Importance"
-                    )
-                    st.plotly_chart(fig)
+                # Save the upload so the training worker reads it in chunks (train_large)
+                contents = uploaded_file.getbuffer()
+                os.makedirs(UPLOAD_DIR, exist_ok=True)
+                upload_path = os.path.join(UPLOAD_DIR, f"{hashlib.sha256(contents).hexdigest()[:16]}.csv")
+                with open(upload_path, 'wb') as f:
+                    f.write(contents)
+
+                # Retrain in the background; predictions keep using the current model
+                st.session_state.retrain_job = model_server.submit_retrain(upload_path)
 
         except Exception as e:
             st.error(f"Error processing uploaded data: {str(e)}")
 
 else:
     if st.button("Generate and Train with Sample Data"):
-        with st.spinner("Generating sample data and training model..."):
-            # Generate sample data
-            X, y = predictor.generate_sample_data()
-
-            # Train model
-            metrics = predictor.train(X, y)
-
-            # Display metrics
-            st.success("Model trained successfully with sample data!")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Training Accuracy", f"{metrics['train_accuracy']:.2%}")
-            with col2:
-                st.metric("Test Accuracy", f"{metrics['test_accuracy']:.2%}")
-
-            # Feature importance plot
-            fig = px.bar(
-                x=list(metrics['feature_importance'].keys()),
-                y=list(metrics['feature_importance'].values()),
-                title="Feature Importance"
-            )
-            st.plotly_chart(fig)
+        # Generate sample data
+        X, y = predictor.generate_sample_data()
+
+        # Retrain in the background; predictions keep using the current model
+        st.session_state.retrain_job = model_server.submit_retrain(X, y)
+
+# Background training status
+if st.session_state.get('retrain_job'):
+    job = model_server.job_status(st.session_state.retrain_job)
+    if job is None:
+        st.session_state.retrain_job = None
+    elif job['status'] in ('queued', 'running'):
+        st.info(f"Model training {job['status']} in the background (submitted {job['submitted_at']}). "
+                "Predictions use the current model until it finishes.")
+        st.button("Refresh training status")
+    elif job['status'] == 'failed':
+        st.error(f"Model training failed: {job['error']}")
+    else:
+        metrics = job['metrics']
+
+        # Display metrics
+        st.success(f"Model trained successfully! Now serving model version {job['version']} "
+                   f"(trained in {metrics['train_seconds']:.1f}s)")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Training Accuracy", f"{metrics['train_accuracy']:.2%}")
+        with col2:
+            st.metric("Test Accuracy", f"{metrics['test_accuracy']:.2%}")
+        if metrics.get('peak_rss_mb'):
+            st.caption(f"{metrics['rows']:,} rows, wall time {metrics['wall_seconds']:.1f}s, "
+                       f"peak memory {metrics['peak_rss_mb']:.0f} MB")
+
+        # Feature importance plot
+        fig = px.bar(
+            x=list(metrics['feature_importance'].keys()),
+            y=list(metrics['feature_importance'].values()),
+            title="Feature Importance"
+        )
+        st.plotly_chart(fig)
 
 # Prediction Section with Automatic Alerts
 st.header("Make Predictions & Generate Alerts")
@@ -134,7 +143,7 @@ if st.button("Predict and Check for Alerts"):
         })
 
         # Get prediction
-        prediction = predictor.predict(input_data)
+        prediction = model_server.predict(input_data)
 
         # Display results
         st.subheader("Prediction Results")
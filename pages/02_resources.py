@@ -1,7 +1,7 @@
 import streamlit as st
 import plotly.express as px
-from utils.data_generator import generate_resource_data
-from utils.resource_optimizer import ResourceOptimizer
+from utils.resource_optimizer import ALLOCATION_METHODS, IncrementalAllocator, ResourceOptimizer
+from utils.sqlite_store import get_store
 import numpy as np
 import pandas as pd
 
@@ -12,12 +12,16 @@ st.title("📦 Resource Management")
 # Initialize resource optimizer
 optimizer = ResourceOptimizer()
 
-# Resource data
-resources = st.session_state.get('resource_data', generate_resource_data())
+# Inventory and evacuation tracking from the shared store
+store = get_store()
+resources = store.resources()
+evacuation_data = store.evacuation_data()
 
-# Get evacuation and alert data
-evacuation_data = st.session_state.get('evacuation_data', {})
-alerts = st.session_state.get('alert_data', {})
+# Each tracked evacuation carries its alert's location and severity
+alerts = {
+    alert_id: {'location': data['location'], 'severity': data['severity']}
+    for alert_id, data in evacuation_data.items()
+}
 
 # Resource allocation
 st.subheader("Resource Allocation")
@@ -40,23 +44,37 @@ with col2:
 # Optimized Resource Allocation
 if evacuation_data and alerts:
     st.subheader("🎯 Optimized Resource Allocation")
-
-    # Get optimized allocations
-    optimized_allocations = optimizer.optimize_allocation(
-        available_resources=resources,
-        alerts=alerts,
-        evacuation_data=evacuation_data
+    method = st.selectbox(
+        "Allocation Method",
+        ALLOCATION_METHODS,
+        help="proportional: weighted fair share; priority/greedy: fill the highest-priority alerts first"
     )
 
-    # Calculate efficiency metrics
-    efficiency_metrics = optimizer.calculate_efficiency_metrics(
-        optimized_allocations,
-        resources
-    )
+    # Get optimized allocations; the incremental allocator kept across reruns
+    # only recomputes what changed since the previous run
+    if method == 'greedy':
+        optimized_allocations = optimizer.optimize_allocation(
+            available_resources=resources,
+            alerts=alerts,
+            evacuation_data=evacuation_data,
+            method=method
+        )
+        alert_ids, resource_names, needs, stock, _ = optimizer.allocation_problem(resources, alerts, evacuation_data)
+        allocation_matrix = np.array(
+            [[optimized_allocations[alert_id][r] for r in resource_names] for alert_id in alert_ids]
+        ).reshape(len(alert_ids), len(resource_names))
+        efficiency_metrics = optimizer.allocation_metrics(allocation_matrix, stock, needs, alert_ids, resource_names)
+    else:
+        allocators = st.session_state.setdefault('allocators', {})
+        if method not in allocators:
+            allocators[method] = IncrementalAllocator(optimizer, method=method)
+        allocators[method].sync(resources, alerts, evacuation_data)
+        optimized_allocations = allocators[method].allocations()
+        efficiency_metrics = allocators[method].metrics()
 
     # Display efficiency metrics
     st.markdown("### Resource Allocation Efficiency")
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric(
             "Resource Utilization",
@@ -70,8 +88,18 @@ if evacuation_data and alerts:
     with col3:
         st.metric(
             "Coverage Ratio",
-            f"{efficiency_metrics['coverage_ratio']:.1%}"
+            f"{efficiency_metrics['coverage_ratio']:.1%}",
+            help="Share of locations whose needs are fully met"
+        )
+    with col4:
+        st.metric(
+            "Fairness Index",
+            f"{efficiency_metrics['fairness_index']:.1%}",
+            help="1 - Gini coefficient of the fill rates across locations and resources"
         )
+    st.dataframe(efficiency_metrics['per_resource'].style.format({
+        'utilization': '{:.1%}', 'fill_rate': '{:.1%}', 'balance': '{:.1%}', 'coverage': '{:.1%}', 'gini': '{:.3f}'
+    }))
 
     # Display allocations by location
     st.markdown("### Allocation by Location")
@@ -139,10 +167,9 @@ with st.form("resource_request"):
         """)
 
     if st.form_submit_button("Submit Request"):
-        # Update resource inventory
-        if resources[resource_type] >= quantity:
-            resources[resource_type] -= quantity
-            st.session_state.resource_data = resources
+        # Deduct atomically, so concurrent requests cannot overdraw the inventory
+        if store.take_resource(resource_type, quantity):
+            resources = store.resources()
             st.success(f"Request submitted for {quantity} {resource_type}(s) to {location}")
         else:
             st.error(f"Insufficient {resource_type} in inventory")
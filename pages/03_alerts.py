@@ -1,7 +1,9 @@
 import streamlit as st
 import plotly.express as px
 from utils.data_generator import generate_alert_data
+from utils.confirmations import phone_key
 from utils.sms_handler import SMSHandler
+from utils.sqlite_store import get_store
 from datetime import datetime
 import uuid
 
@@ -9,12 +11,14 @@ st.set_page_config(page_title="Alert System", page_icon="🚨")
 
 st.title("🚨 Alert System")
 
-# Initialize SMS Handler
-sms_handler = SMSHandler()
+# Alerts and evacuation tracking live in the shared store, so they survive
+# restarts and replies ingested by the API show up here
+store = get_store()
+
+# Initialize SMS Handler (bare "YES" replies resolve through the store)
+sms_handler = SMSHandler(store=store)
 
 # Initialize session state for tracking
-if 'evacuation_data' not in st.session_state:
-    st.session_state.evacuation_data = {}
 if 'alerts_sent' not in st.session_state:
     st.session_state.alerts_sent = []
 
@@ -47,15 +51,24 @@ with st.form("create_alert"):
             numbers_list = [num.strip() for num in phone_numbers.split('\n') if num.strip()]
             total_recipients = len(numbers_list)
 
-            # Initialize evacuation tracking
-            st.session_state.evacuation_data[alert_id] = {
+            # Record the alert (so SMS replies can confirm it) and initialize evacuation tracking
+            store.add({
+                'id': alert_id,
+                'message': message,
+                'location': location,
+                'severity': severity,
+                'timestamp': datetime.now(),
+                'recipients': total_recipients
+            })
+            store.upsert_evacuation(alert_id, {
                 'total': total_recipients,
                 'confirmed': 0,
                 'location': location,
                 'timestamp': datetime.now(),
                 'message': message,
                 'severity': severity
-            }
+            })
+            store.record_recipients(alert_id, [key for key in map(phone_key, numbers_list) if key is not None])
 
             # Send SMS alerts
             for number in numbers_list:
@@ -82,8 +95,9 @@ with st.form("create_alert"):
 
 # Evacuation Response Tracking Dashboard
 st.subheader("📊 Evacuation Response Dashboard")
-if st.session_state.evacuation_data:
-    for alert_id, data in st.session_state.evacuation_data.items():
+evacuation_data = store.evacuation_data()
+if evacuation_data:
+    for alert_id, data in evacuation_data.items():
         with st.expander(f"Alert: {data['message']} - {data['location']}"):
             response_rate = (data['confirmed'] / data['total'] * 100) if data['total'] > 0 else 0
 
@@ -114,10 +128,7 @@ if st.session_state.evacuation_data:
             # Demo: Simulate evacuation responses
             if demo_mode:
                 if st.button(f"Simulate Evacuation Response (Alert {alert_id})", key=f"sim_{alert_id}"):
-                    data['confirmed'] += min(
-                        1,
-                        data['total'] - data['confirmed']
-                    )
+                    store.confirm_evacuations({alert_id: 1})
                     st.rerun()  # Using st.rerun() instead of st.experimental_rerun()
 
 # Alert Statistics
@@ -2,7 +2,10 @@ import streamlit as st
 import folium
 from streamlit_folium import folium_static
 import pandas as pd
-from utils.data_generator import generate_disaster_data, generate_resource_data
+from utils.data_generator import generate_disaster_data
+from utils.geo_allocation import DepotAllocator
+from utils.resource_optimizer import ResourceOptimizer
+from utils.sqlite_store import get_store
 
 st.set_page_config(page_title="Interactive Map", page_icon="🗺️", layout="wide")
 
@@ -13,9 +16,9 @@ m = folium.Map(location=[20.5937, 78.9629], zoom_start=5)
 
 # Get data from session state or generate new
 disasters = st.session_state.get('disaster_data', generate_disaster_data())
-resources = st.session_state.get('resource_data', generate_resource_data())
-alerts = st.session_state.get('alert_data', {})
-evacuation_data = st.session_state.get('evacuation_data', {})
+store = get_store()
+resources = store.resources()
+evacuation_data = store.evacuation_data()
 
 # Sidebar controls
 st.sidebar.header("Map Controls")
@@ -56,18 +59,40 @@ if show_disasters:
 
 # Add resource markers
 if show_resources:
-    for location, coords in city_coords.items():
-        # Add marker for each resource type
-        resource_info = "<b>Available Resources</b><br>"
-        for resource, quantity in resources.items():
-            resource_info += f"{resource}: {quantity}<br>"
-        
+    # Each city is a depot holding an equal share of the national inventory;
+    # alerts draw from the nearest depots first
+    depots = DepotAllocator.from_pool(resources, city_coords)
+    # Evacuation entries carry their alert's severity
+    evacuation_alerts = {alert_id: {'severity': data['severity']} for alert_id, data in evacuation_data.items()}
+    depot_plan = ResourceOptimizer().optimize_depot_allocation(depots, evacuation_alerts, evacuation_data, city_coords)
+    shipments = depot_plan['shipments']
+    destinations = {alert_id: evacuation_data[alert_id]['location'] for alert_id in depot_plan['alert_ids']}
+    shipments['city'] = shipments['destination'].map(destinations)
+
+    for i, (location, coords) in enumerate(city_coords.items()):
+        resource_info = f"<b>{location} Depot</b><br>"
+        for resource, quantity in zip(depots.resource_names, depots.depot_stock[i]):
+            shipped = shipments.loc[(shipments['depot'] == location) & (shipments['resource'] == resource), 'quantity'].sum()
+            received = shipments.loc[(shipments['city'] == location) & (shipments['resource'] == resource), 'quantity'].sum()
+            resource_info += f"{resource}: {quantity} held, {shipped} shipped, {received} received<br>"
+
         folium.Marker(
             coords,
-            popup=folium.Popup(resource_info, max_width=300),
+            popup=folium.Popup(resource_info, max_width=400),
             icon=folium.Icon(color='blue', icon='info-sign')
         ).add_to(m)
 
+    # Supply routes between cities
+    routes = shipments[shipments['depot'] != shipments['city']].groupby(['depot', 'city'])['quantity'].sum()
+    for (depot, city), quantity in routes.items():
+        folium.PolyLine(
+            locations=[city_coords[depot], city_coords[city]],
+            color='blue',
+            weight=2,
+            dash_array='5',
+            popup=f"<b>Supply Route</b><br>{depot} → {city}<br>Units: {quantity}"
+        ).add_to(m)
+
 # Add evacuation routes
 if show_evacuation and evacuation_data:
     for alert_id, data in evacuation_data.items():
@@ -99,7 +124,8 @@ st.markdown("""
 - 🔴 Red Circles: High-risk disaster zones
 - 🟡 Orange Circles: Medium-risk disaster zones
 - 🟢 Green Circles: Low-risk disaster zones
-- 📍 Blue Markers: Resource locations
+- 📍 Blue Markers: Resource depots
+- 🔵 Dashed Blue Lines: Supply routes between depots
 - 📍 Green Lines: Evacuation routes
 """)
 
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+
+from utils.alert_store import AlertStore
+from utils.confirmations import ConfirmationIngestor, phone_key
+from utils.sqlite_store import SQLiteStore
+
+SAME_PHONE = ['+91 97423-42120', '919742342120', '0091 9742342120', '09742342120', '9742342120']
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    store = AlertStore() if request.param == 'memory' else SQLiteStore(str(tmp_path / 'alerts.db'))
+    store.add({
+        'id': 'A1',
+        'message': 'Flood warning',
+        'location': 'Mumbai',
+        'severity': 'High',
+        'timestamp': datetime(2026, 1, 1),
+        'disaster_type': 'flood',
+        'probability': 0.9,
+        'recipients': 3
+    })
+    return store
+
+
+def test_phone_formats_share_a_key():
+    assert len({phone_key(phone) for phone in SAME_PHONE}) == 1
+    assert phone_key('+1 415 555 0100') != phone_key('4155550100')
+    assert phone_key('no digits') is None
+
+
+def test_repeated_confirmation_in_another_format_counts_once(store):
+    ingestor = ConfirmationIngestor(store)
+
+    assert ingestor.ingest_one('A1', SAME_PHONE[0])
+    for phone in SAME_PHONE[1:]:
+        assert not ingestor.ingest_one('A1', phone)
+
+    assert store.get('A1')['confirmed_safe'] == 1
+    assert store.totals()['confirmed'] == 1
+
+
+def test_batch_counts_duplicates_unknown_and_invalid(store):
+    result = ConfirmationIngestor(store).ingest(
+        [{'alert_id': 'A1', 'phone_number': phone} for phone in SAME_PHONE]
+        + [{'alert_id': 'A1', 'phone_number': '9876543210'},
+           {'alert_id': 'missing', 'phone_number': '9876543210'},
+           {'alert_id': 'A1', 'phone_number': ''}]
+    )
+
+    assert result == {'submitted': 8, 'accepted': 2, 'duplicates': 4, 'unknown_alert': 1, 'invalid': 1}
+    assert store.get('A1')['confirmed_safe'] == 2
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from utils.ml_predictor import DisasterPredictor
+
+
+@pytest.fixture
+def predictor(tmp_path):
+    predictor = DisasterPredictor(load=False)
+    predictor.model_path = str(tmp_path / 'model.joblib')
+    predictor.observations_path = str(tmp_path / 'observations.csv')
+    predictor.training_data_path = str(tmp_path / 'missing.csv')  # Falls back to the generated sample data
+    predictor.train_default()
+    return predictor
+
+
+def unrelated_inputs(predictor):
+    """Sample readings of every class except flood"""
+    X, y = predictor.generate_sample_data()
+    return X[y != 0].to_numpy()
+
+
+def flood_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(200, 300, n),  # rainfall
+        rng.uniform(20, 30, n),  # temperature
+        rng.uniform(0, 1, n),  # seismic_activity
+        rng.uniform(0, 10, n)  # wind_speed
+    ]), np.zeros(n, dtype=np.int64)
+
+
+def test_small_updates_are_held_until_min_update_rows(predictor):
+    inputs = unrelated_inputs(predictor)
+    before, _ = predictor.predict_batch(inputs)
+    version = predictor.model_version
+    X, y = flood_rows(5)
+
+    for i in range(5):
+        metrics = predictor.update(X[i:i + 1], y[i:i + 1])
+
+    after, _ = predictor.predict_batch(inputs)
+    assert metrics['pending'] == 5
+    assert predictor.model_version == version
+    np.testing.assert_array_equal(after, before)
+
+
+def test_update_trees_scale_with_batch_size(predictor):
+    inputs = unrelated_inputs(predictor)
+    before, _ = predictor.predict_batch(inputs)
+    trees = len(predictor.model.estimators_)
+    X, y = flood_rows(predictor.min_update_rows)
+
+    predictor.update(X, y)
+
+    after, _ = predictor.predict_batch(inputs)
+    expected = round(predictor.model_params['n_estimators'] * len(y) / predictor.training_rows)
+    assert len(predictor.model.estimators_) == trees + expected
+    assert np.abs(after - before).max() < 0.1
+
+
+def restarted(predictor):
+    """A new predictor on the same files, as after a restart"""
+    other = DisasterPredictor(load=False)
+    other.model_path, other.observations_path, other.training_data_path = (
+        predictor.model_path, predictor.observations_path, predictor.training_data_path)
+    return other
+
+
+def test_retrain_keeps_recorded_observations_and_bumps_the_version(predictor):
+    X, y = flood_rows(predictor.min_update_rows)
+    predictor.update(X, y)
+    version = predictor.model_version
+
+    metrics = predictor.train_default()
+
+    assert metrics['observation_rows'] == len(y)
+    assert predictor.observation_rows == len(y)
+    assert predictor.model_version == version + 1
+    assert restarted(predictor).load_cached()
+
+
+def test_restart_reuses_the_updated_model(predictor):
+    X, y = flood_rows(predictor.min_update_rows + 3)
+    predictor.update(X[:-3], y[:-3])
+    predictor.update(X[-3:], y[-3:])  # Held in pending
+    inputs = unrelated_inputs(predictor)
+
+    other = restarted(predictor)
+    assert other.load_cached()
+
+    assert other.model_key == predictor.model_key
+    assert other.model_version == predictor.model_version
+    assert len(other.pending[1]) == 3
+    np.testing.assert_array_equal(other.predict_batch(inputs)[0], predictor.predict_batch(inputs)[0])
+
+
+def test_restart_replays_observations_recorded_elsewhere(predictor):
+    other = restarted(predictor)
+    X, y = flood_rows(predictor.min_update_rows)
+    other.load_cached()
+    other.update(X, y)  # e.g. another process; this artifact is then overwritten by an older copy
+    predictor.save_model()
+
+    again = restarted(predictor)
+    assert again.load_cached()
+    assert again.observation_rows == len(y)
+    assert len(again.model.estimators_) == len(other.model.estimators_)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from utils.resource_optimizer import IncrementalAllocator, ResourceOptimizer
+
+
+@pytest.fixture
+def optimizer():
+    return ResourceOptimizer()
+
+
+def random_problems(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        n = int(rng.integers(1, 10))
+        needs = rng.integers(0, 60, (n, 4))
+        stock = rng.integers(0, 200, 4)
+        # Many zero (fully confirmed) and tied priorities
+        priority = rng.integers(0, 4, n) * rng.choice([0.0, 1.0, 2.5], n)
+        yield needs, stock, priority
+
+
+@pytest.mark.parametrize('method', ['proportional', 'priority'])
+def test_allocation_stays_within_stock_and_need(optimizer, method):
+    for needs, stock, priority in random_problems(2000):
+        allocation = optimizer.allocate(needs, stock, priority, method=method)
+
+        assert (allocation >= 0).all()
+        assert (allocation <= needs).all()
+        assert (allocation.sum(axis=0) <= stock).all()
+        # Nothing is held back while some need is unmet
+        np.testing.assert_array_equal(allocation.sum(axis=0), np.minimum(stock, needs.sum(axis=0)))
+
+
+@pytest.mark.parametrize('method', ['proportional', 'priority', 'greedy'])
+def test_fully_confirmed_alert_does_not_exceed_stock(optimizer, method):
+    alerts = {'high': {'severity': 'High'}, 'done': {'severity': 'Low'}}
+    evacuation_data = {'high': {'total': 200, 'confirmed': 100}, 'done': {'total': 3000, 'confirmed': 3000}}
+
+    result = optimizer.optimize_allocation({'Emergency Vehicles': 50}, alerts, evacuation_data, method=method)
+
+    assert result['high']['Emergency Vehicles'] + result['done']['Emergency Vehicles'] == 50
+    # The alert with people left to evacuate is served first
+    assert result['high']['Emergency Vehicles'] == optimizer.calculate_resource_needs(200, 'High', 0.5)['Emergency Vehicles']
+
+
+def test_proportional_gives_zero_priority_alerts_only_the_leftover(optimizer):
+    needs = np.array([[10], [40], [30]])
+    priority = np.array([2.0, 1.0, 0.0])
+
+    short = optimizer.allocate(needs, np.array([45]), priority)
+    spare = optimizer.allocate(needs, np.array([65]), priority)
+
+    assert short[2, 0] == 0
+    np.testing.assert_array_equal(spare[:, 0], [10, 40, 15])
+
+
+@pytest.mark.parametrize('method', ['proportional', 'priority'])
+def test_incremental_allocation_matches_a_full_recompute(optimizer, method):
+    rng = np.random.default_rng(1)
+    allocator = IncrementalAllocator(optimizer, method=method)
+    alerts, evacuation_data, stock = {}, {}, {}
+
+    for step in range(400):
+        action = rng.random()
+        if action < 0.1:
+            stock = {name: int(rng.integers(0, 400)) for name in allocator.resource_names}
+        elif action < 0.2 and alerts:
+            alert_id = str(rng.choice(list(alerts)))
+            del alerts[alert_id], evacuation_data[alert_id]
+        else:
+            alert_id = f'A{rng.integers(0, 40)}'
+            total = int(rng.choice([100, 200, 1000]))
+            # Many fully confirmed (zero priority) and otherwise tied alerts
+            confirmed = total if rng.random() < 0.4 else int(rng.choice([0, total // 2]))
+            alerts[alert_id] = {'severity': str(rng.choice(['High', 'Low']))}
+            evacuation_data[alert_id] = {'total': total, 'confirmed': confirmed}
+
+        allocator.sync(stock, alerts, evacuation_data)
+        expected = optimizer.optimize_allocation(stock, alerts, evacuation_data, method=method)
+
+        assert list(allocator.allocations().items()) == list(expected.items()), step
@@ -0,0 +1,45 @@
+import pytest
+
+from utils.confirmations import phone_key
+from utils.sms_handler import SMSHandler, parse_reply
+from utils.sqlite_store import SQLiteStore
+
+ALERT_ID = '1b4e28ba-2fa1-11d2-883f-0016d3cca427'
+
+
+@pytest.mark.parametrize('body, expected', [
+    ('YES', (True, None)),
+    (f'yes {ALERT_ID.upper()}', (True, ALERT_ID)),
+    ('Safe. Alert ID: A-17', (True, 'A-17')),
+    ('YES\n> EMERGENCY ALERT: Flood in Mumbai', (True, None)),
+    ('Ok but I need help', (False, None)),
+    ('Safe? no, trapped', (False, None)),
+    ('yesterday was fine', (False, None)),
+    ('', (False, None)),
+])
+def test_parse_reply(body, expected):
+    assert parse_reply(body) == expected
+
+
+def test_bare_yes_resolves_through_the_store_after_restart(tmp_path):
+    path = str(tmp_path / 'alerts.db')
+    store = SQLiteStore(path)
+    store.record_recipients('first', [phone_key('+919742342120')])
+    store.record_recipients('second', [phone_key('+919742342120'), phone_key('+916362171135')])
+
+    # A new handler and connection, as after a restart or in another worker
+    handler = SMSHandler(store=SQLiteStore(path))
+    result = handler.process_response('09742342120', 'YES')
+
+    assert result['success'] and result['alert_id'] == 'second'
+    assert not handler.process_response('+15550100', 'YES')['success']
+
+
+def test_resent_alert_becomes_the_latest_again(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'alerts.db'))
+    phone = phone_key('+919742342120')
+    store.record_recipients('first', [phone])
+    store.record_recipients('second', [phone])
+    store.record_recipients('first', [phone])
+
+    assert store.last_alert_for(phone) == 'first'
@@ -0,0 +1,38 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from utils.tree_engine import CompiledForest
+
+
+def fitted_forest(seed=0, **params):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(600, 4))
+    y = (X[:, 0] + X[:, 1] ** 2 > 1).astype(int) + (X[:, 2] > 0.5).astype(int) * 2
+    return RandomForestClassifier(n_estimators=25, random_state=seed, **params).fit(X, y), rng
+
+
+def test_predict_proba_matches_sklearn():
+    forest, rng = fitted_forest(max_depth=12)
+    X = rng.normal(size=(1000, 4))
+
+    np.testing.assert_allclose(CompiledForest(forest).predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_predict_proba_matches_sklearn_across_blocks_and_single_rows():
+    forest, rng = fitted_forest(seed=1, class_weight='balanced', min_samples_leaf=3)
+    X = rng.normal(size=(257, 4))
+    compiled = CompiledForest(forest, block_rows=64)
+
+    np.testing.assert_allclose(compiled.predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(compiled.predict_proba(X[:1]), forest.predict_proba(X[:1]), rtol=0, atol=1e-12)
+
+
+def test_predict_proba_on_threshold_values():
+    forest, _ = fitted_forest(seed=2)
+    # Rows exactly on split thresholds must take the same (left, <=) branch as sklearn
+    thresholds = forest.estimators_[0].tree_.threshold
+    splits = forest.estimators_[0].tree_.feature
+    X = np.zeros((int((splits >= 0).sum()), 4))
+    X[np.arange(len(X)), splits[splits >= 0]] = thresholds[splits >= 0]
+
+    np.testing.assert_allclose(CompiledForest(forest).predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
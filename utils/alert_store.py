@@ -0,0 +1,159 @@
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AlertStore:
+    """In-memory alert repository with O(1) lookup and secondary indexes
+
+    Alerts are dicts with at least 'id', 'location', 'disaster_type',
+    'timestamp' and 'recipients'. The store keeps each alert's
+    confirmation_stats and the overall totals up to date as confirmations
+    arrive, so pages never have to rescan every alert.
+    """
+
+    def __init__(self):
+        self._alerts = {}
+        self._confirmed_phones = defaultdict(set)  # alert_id -> integer phone numbers
+        self._last_alert_by_phone = {}  # Integer phone number -> latest alert sent there
+        self._by_location = defaultdict(list)
+        self._by_disaster_type = defaultdict(list)
+        self._by_time = []  # Sorted (timestamp, seq, alert_id)
+        self._seq = 0
+        self._totals = {'alerts': 0, 'total_sent': 0, 'confirmed': 0, 'pending': 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def __contains__(self, alert_id):
+        return alert_id in self._alerts
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def add(self, alert):
+        """Insert an alert and index it"""
+        alert_id = alert['id']
+        timestamp = self._as_datetime(alert.get('timestamp'))
+        recipients = alert.get('recipients', 0)
+        confirmed = alert.get('confirmed_safe', 0)
+        alert['confirmed_safe'] = confirmed
+        alert['confirmation_stats'] = {
+            'total_sent': recipients,
+            'confirmed': confirmed,
+            'pending': recipients - confirmed
+        }
+
+        with self._lock:
+            if alert_id in self._alerts:
+                raise ValueError(f"Alert {alert_id} already exists")
+            self._alerts[alert_id] = alert
+            self._by_location[alert.get('location')].append(alert_id)
+            self._by_disaster_type[alert.get('disaster_type')].append(alert_id)
+            self._seq += 1
+            bisect.insort(self._by_time, (timestamp, self._seq, alert_id))
+
+            self._totals['alerts'] += 1
+            self._totals['total_sent'] += recipients
+            self._totals['confirmed'] += confirmed
+            self._totals['pending'] += recipients - confirmed
+        return alert
+
+    def get(self, alert_id):
+        """Look up an alert by ID, or None"""
+        return self._alerts.get(alert_id)
+
+    def all(self):
+        """Every alert in insertion order"""
+        with self._lock:
+            return list(self._alerts.values())
+
+    def by_location(self, location):
+        with self._lock:
+            return [self._alerts[alert_id] for alert_id in self._by_location.get(location, [])]
+
+    def by_disaster_type(self, disaster_type):
+        with self._lock:
+            return [self._alerts[alert_id] for alert_id in self._by_disaster_type.get(disaster_type, [])]
+
+    def between(self, start=None, end=None):
+        """Alerts with start <= timestamp <= end, oldest first"""
+        with self._lock:
+            lo = 0 if start is None else bisect.bisect_left(self._by_time, (self._as_datetime(start),))
+            hi = len(self._by_time) if end is None else bisect.bisect_right(
+                self._by_time, (self._as_datetime(end), float('inf'))
+            )
+            return [self._alerts[alert_id] for _, _, alert_id in self._by_time[lo:hi]]
+
+    def recent(self, limit=100):
+        """The newest alerts first"""
+        if limit <= 0:
+            return []
+        with self._lock:
+            return [self._alerts[alert_id] for _, _, alert_id in reversed(self._by_time[-limit:])]
+
+    def confirm(self, alert_id, count=1):
+        """Add confirmations to an alert and update its stats and the totals"""
+        with self._lock:
+            alert = self._alerts.get(alert_id)
+            if alert is None:
+                raise KeyError(f"Alert {alert_id} not found")
+            alert['confirmed_safe'] += count
+            stats = alert['confirmation_stats']
+            stats['confirmed'] += count
+            stats['pending'] -= count
+            self._totals['confirmed'] += count
+            self._totals['pending'] -= count
+            return alert
+
+    def confirm_unique(self, pairs):
+        """Record (alert_id, phone) confirmations, ignoring ones already seen
+
+        phone must be the integer form of the number. Returns how many pairs
+        were new.
+        """
+        accepted = 0
+        with self._lock:
+            for alert_id, phone in pairs:
+                if alert_id not in self._alerts or phone in self._confirmed_phones[alert_id]:
+                    continue
+                self._confirmed_phones[alert_id].add(phone)
+                alert = self._alerts[alert_id]
+                alert['confirmed_safe'] += 1
+                alert['confirmation_stats']['confirmed'] += 1
+                alert['confirmation_stats']['pending'] -= 1
+                accepted += 1
+            self._totals['confirmed'] += accepted
+            self._totals['pending'] -= accepted
+        return accepted
+
+    def record_recipients(self, alert_id, phones):
+        """Note that alert_id was sent to phones (integer phone numbers)"""
+        with self._lock:
+            for phone in phones:
+                self._last_alert_by_phone[phone] = alert_id
+        return len(phones)
+
+    def last_alert_for(self, phone):
+        """ID of the latest alert sent to an integer phone number, or None"""
+        with self._lock:
+            return self._last_alert_by_phone.get(phone)
+
+    def totals(self):
+        """Overall alert, notification and confirmation counts"""
+        with self._lock:
+            return dict(self._totals)
+
+    @staticmethod
+    def _as_datetime(value):
+        if value is None:
+            return datetime.now()
+        if isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(str(value))
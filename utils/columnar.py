@@ -0,0 +1,268 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+def columnar_path(csv_path):
+    """Default location of the columnar copy of a CSV: data/x.csv -> data/x.cols"""
+    return os.path.splitext(csv_path)[0] + '.cols'
+
+def _merge_kind(previous, kind):
+    """Widen a column's inferred kind across chunks ('b' < 'i' < 'f' < 'U')"""
+    if previous is None or previous == kind:
+        return kind
+    if 'U' in (previous, kind):
+        return 'U'
+    if 'b' in (previous, kind):
+        return 'U'  # Booleans mixed with numbers are kept as text
+    return 'f'
+
+def _infer_schema(csv_path, chunksize):
+    """Scan a CSV once for its row count, column kinds, integer ranges and text widths"""
+    rows = 0
+    kinds, widths, ranges = {}, {}, {}
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        rows += len(chunk)
+        for col in chunk.columns:
+            dtype_kind = chunk[col].dtype.kind
+            kind = dtype_kind if dtype_kind in 'bif' else 'U'
+            kinds[col] = _merge_kind(kinds.get(col), kind)
+            if kind == 'i' and len(chunk):
+                lo, hi = ranges.get(col, (0, 0))
+                ranges[col] = (min(lo, int(chunk[col].min())), max(hi, int(chunk[col].max())))
+            if kind == 'U' and len(chunk):
+                widths[col] = max(widths.get(col, 1), int(chunk[col].astype(str).str.len().max()))
+
+    schema = {}
+    for col, kind in kinds.items():
+        if kind == 'f':
+            schema[col] = 'float32'
+        elif kind == 'i':
+            lo, hi = ranges.get(col, (0, 0))
+            info = np.iinfo(np.int32)
+            schema[col] = 'int32' if info.min <= lo and hi <= info.max else 'int64'
+        elif kind == 'b':
+            schema[col] = 'bool'
+        else:
+            schema[col] = f"<U{widths.get(col, 1)}"
+    return rows, schema, digest.hexdigest()
+
+def write_columnar(out_dir, schema, rows, chunks, source):
+    """Write chunks (DataFrames or dicts of arrays) into a columnar directory
+
+    schema maps column name to dtype string and rows is the total row
+    count, so each .npy file is preallocated on disk and filled chunk by
+    chunk. source is stored in the manifest after the last chunk has been
+    consumed; its 'sha256' identifies the data for model caching. The
+    directory is replaced atomically.
+    """
+    tmp_dir = f"{out_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        files = {col: f"{i:03d}.npy" for i, col in enumerate(schema)}
+        outputs = {
+            col: np.lib.format.open_memmap(os.path.join(tmp_dir, files[col]), mode='w+',
+                                           dtype=np.dtype(dtype), shape=(rows,))
+            for col, dtype in schema.items()
+        }
+        offset = 0
+        for chunk in chunks:
+            end = offset + len(chunk[next(iter(schema))])
+            for col, output in outputs.items():
+                output[offset:end] = np.asarray(chunk[col])
+            offset = end
+        if offset != rows:
+            raise ValueError(f"Expected {rows} rows, got {offset}")
+        for output in outputs.values():
+            output.flush()
+        del outputs
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'rows': rows,
+            'columns': {col: {'file': files[col], 'dtype': dtype} for col, dtype in schema.items()},
+            'source': source,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap directories; readers holding memory maps of the old files keep them
+        old_dir = f"{out_dir}.{os.getpid()}.old"
+        if os.path.exists(out_dir):
+            os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return out_dir
+
+def convert_csv(csv_path, out_dir=None, chunksize=500000):
+    """Convert a CSV into a directory with one .npy file per column
+
+    The CSV is streamed twice in chunks: once to infer the schema (floats
+    become float32, integers int32 where they fit, text fixed-width
+    unicode) and once to fill preallocated .npy files on disk, so memory
+    stays bounded by the chunk size. The manifest records the source size,
+    mtime and SHA-256 so stale copies can be detected without re-reading
+    the CSV. Returns the directory path.
+    """
+    start = time.perf_counter()
+    out_dir = out_dir or columnar_path(csv_path)
+    rows, schema, source_digest = _infer_schema(csv_path, chunksize)
+    read_dtypes = {col: (str if dtype.startswith('<U') else dtype) for col, dtype in schema.items()}
+
+    def chunks():
+        for chunk in pd.read_csv(csv_path, dtype=read_dtypes, chunksize=chunksize):
+            for col, dtype in read_dtypes.items():
+                if dtype is str:
+                    chunk[col] = chunk[col].fillna('')
+            yield chunk
+
+    stat = os.stat(csv_path)
+    write_columnar(out_dir, schema, rows, chunks(), {
+        'path': os.path.abspath(csv_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': source_digest
+    })
+    logger.info(f"Converted {csv_path} ({rows} rows, {len(schema)} columns) to {out_dir} "
+                f"in {time.perf_counter() - start:.2f}s")
+    return out_dir
+
+class ColumnarDataset:
+    """Read-only view of a converted dataset backed by memory-mapped .npy files
+
+    Opening only reads the manifest; columns are mapped on first access and
+    shared with the page cache, so loading costs milliseconds and no heap
+    memory regardless of file size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar format version in {path}")
+        self._columns = {}
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def __contains__(self, column):
+        return column in self.manifest['columns']
+
+    def __getitem__(self, column):
+        return self.column(column)
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'])
+
+    @property
+    def source_digest(self):
+        """SHA-256 of the CSV this dataset was converted from"""
+        return self.manifest['source']['sha256']
+
+    def column(self, name):
+        """Memory-mapped 1-D array for one column (zero-copy, read-only)"""
+        if name not in self._columns:
+            entry = self.manifest['columns'].get(name)
+            if entry is None:
+                raise KeyError(f"Column {name} not in {self.path}")
+            self._columns[name] = np.load(os.path.join(self.path, entry['file']), mmap_mode='r')
+        return self._columns[name]
+
+    def matrix(self, columns, dtype=np.float32):
+        """Gather columns into one freshly allocated (N, k) array
+
+        This is the single working copy a model needs; the columns
+        themselves are never loaded into memory beforehand.
+        """
+        X = np.empty((len(self), len(columns)), dtype=dtype)
+        for j, name in enumerate(columns):
+            X[:, j] = self.column(name)
+        return X
+
+    def to_frame(self, columns=None):
+        """Materialize (a subset of) the dataset as a DataFrame"""
+        return pd.DataFrame({name: np.asarray(self.column(name)) for name in (columns or self.columns)})
+
+    def is_fresh(self, csv_path=None):
+        """True if the source CSV is unchanged since conversion, or no longer present"""
+        source = self.manifest['source']
+        if not (csv_path or source.get('path')):
+            return True  # Written directly, e.g. by the synthetic data generator
+        try:
+            stat = os.stat(csv_path or source['path'])
+        except OSError:
+            return True
+        return stat.st_size == source['size'] and stat.st_mtime_ns == source['mtime_ns']
+
+def open_columnar(csv_path, path=None):
+    """Open the columnar copy of csv_path if one exists and is up to date, else None"""
+    path = path or columnar_path(csv_path)
+    if not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        return None
+    try:
+        dataset = ColumnarDataset(path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not open columnar data at {path}: {e}")
+        return None
+    if not dataset.is_fresh(csv_path):
+        logger.info(f"Columnar data at {path} is stale for {csv_path}, using the CSV")
+        return None
+    return dataset
+
+def benchmark(csv_path='data/training_data.csv', columns=None):
+    """Compare CSV parsing with opening and gathering the memory-mapped copy"""
+    columns = columns or ['temperature', 'rainfall', 'wind_speed', 'seismic_activity']
+    path = convert_csv(csv_path)
+
+    start = time.perf_counter()
+    data = pd.read_csv(csv_path)
+    X_csv = data[columns].to_numpy(dtype=np.float32)
+    csv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dataset = ColumnarDataset(path)
+    for name in columns:
+        dataset.column(name)
+    open_seconds = time.perf_counter() - start
+    X_cols = dataset.matrix(columns)
+    gather_seconds = time.perf_counter() - start - open_seconds
+
+    return {
+        'rows': len(dataset),
+        'csv_seconds': csv_seconds,
+        'mmap_open_seconds': open_seconds,
+        'gather_seconds': gather_seconds,
+        'identical': bool(np.array_equal(X_csv, X_cols))
+    }
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        for csv_file in sys.argv[1:]:
+            print(convert_csv(csv_file))
+    else:
+        print(benchmark())
@@ -0,0 +1,133 @@
+import logging
+import os
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Country code assumed for numbers written in national form (e.g. 09742342120)
+DEFAULT_COUNTRY_CODE = os.environ.get('DEFAULT_COUNTRY_CODE', '91')
+NATIONAL_NUMBER_DIGITS = 10
+
+def phone_key(phone_number, country_code=None):
+    """Compact integer form of a phone number's E.164 digits, for de-duplication
+
+    '+91 97423-42120', '919742342120', '0091 9742342120', '09742342120' and
+    '9742342120' all map to the same key: a leading + or 00 marks an
+    international number, and a trunk 0 or a bare national number gets the
+    default country code. Returns None when the input has no digits.
+    """
+    text = str(phone_number).strip()
+    digits = ''.join(ch for ch in text if ch.isdigit())
+    if not digits:
+        return None
+    if not text.startswith('+'):
+        if digits.startswith('00'):
+            digits = digits[2:]
+        elif digits.startswith('0') or len(digits) <= NATIONAL_NUMBER_DIGITS:
+            digits = (country_code or DEFAULT_COUNTRY_CODE) + digits.lstrip('0')
+    return int(digits) if digits else None
+
+class ConfirmationIngestor:
+    """Idempotent safety-confirmation intake
+
+    Each (alert_id, phone number) pair is counted at most once, no matter how
+    often it is retried or how many duplicate SMS replies arrive. A batch is
+    validated, de-duplicated and then handed to the store in one call; the
+    store enforces uniqueness (a set per alert in memory, a primary key in
+    SQLite), so counts stay exact with many concurrent writers.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def ingest(self, confirmations):
+        """Record an iterable of {'alert_id': ..., 'phone_number': ...} items
+
+        Returns counts of accepted, duplicate, unknown-alert and invalid items.
+        """
+        pairs = set()
+        invalid = 0
+        submitted = 0
+        for item in confirmations:
+            submitted += 1
+            alert_id = item.get('alert_id')
+            phone = phone_key(item.get('phone_number', ''))
+            if not alert_id or phone is None:
+                invalid += 1
+                continue
+            pairs.add((alert_id, phone))
+
+        # One existence check per distinct alert, not per confirmation
+        known = {alert_id for alert_id in {alert_id for alert_id, _ in pairs} if alert_id in self.store}
+        valid_pairs = [pair for pair in pairs if pair[0] in known]
+        unknown = sum(1 for pair in pairs if pair[0] not in known)
+
+        accepted = self.store.confirm_unique(valid_pairs)
+        result = {
+            'submitted': submitted,
+            'accepted': accepted,
+            'duplicates': submitted - invalid - unknown - accepted,
+            'unknown_alert': unknown,
+            'invalid': invalid
+        }
+        logger.info(f"Ingested confirmations: {result}")
+        return result
+
+    def ingest_one(self, alert_id, phone_number):
+        """Record a single confirmation; returns True if it was new"""
+        return self.ingest([{'alert_id': alert_id, 'phone_number': phone_number}])['accepted'] == 1
+
+def benchmark(store, n_alerts=100, n_confirmations=200000, batch_size=1000, threads=4, duplicate_rate=0.2):
+    """Measure ingestion throughput against a store with concurrent writers"""
+    import random
+    import threading
+    import uuid
+
+    alert_ids = [str(uuid.uuid4()) for _ in range(n_alerts)]
+    for alert_id in alert_ids:
+        store.add({'id': alert_id, 'location': 'Benchmark', 'disaster_type': 'flood', 'recipients': n_confirmations})
+
+    rng = random.Random(42)
+    n_unique = int(n_confirmations * (1 - duplicate_rate))
+    items = [{'alert_id': alert_ids[i % n_alerts], 'phone_number': f"+91{i:010d}"} for i in range(n_unique)]
+    items += [rng.choice(items) for _ in range(n_confirmations - n_unique)]
+    rng.shuffle(items)
+
+    ingestor = ConfirmationIngestor(store)
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    chunks = [batches[i::threads] for i in range(threads)]
+
+    def run(chunk):
+        for batch in chunk:
+            ingestor.ingest(batch)
+
+    logger.setLevel(logging.WARNING)
+    start = time.perf_counter()
+    workers = [threading.Thread(target=run, args=(chunk,)) for chunk in chunks]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    logger.setLevel(logging.INFO)
+
+    confirmed = sum(store.get(alert_id)['confirmed_safe'] for alert_id in alert_ids)
+    return {
+        'confirmations': n_confirmations,
+        'unique': n_unique,
+        'counted': confirmed,
+        'exact': confirmed == n_unique,
+        'seconds': elapsed,
+        'per_second': n_confirmations / elapsed
+    }
+
+if __name__ == "__main__":
+    import tempfile
+    from utils.alert_store import AlertStore
+    from utils.sqlite_store import SQLiteStore
+
+    print('memory:', benchmark(AlertStore()))
+    with tempfile.TemporaryDirectory() as tmp:
+        print('sqlite:', benchmark(SQLiteStore(f"{tmp}/benchmark.db")))
@@ -0,0 +1,158 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+from scipy.spatial import cKDTree
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments broadcast like NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def distance_matrix(origins, destinations):
+    """(n, m) haversine distances between (n, 2) and (m, 2) [lat, lon] arrays"""
+    origins = np.asarray(origins, dtype=np.float64)
+    destinations = np.asarray(destinations, dtype=np.float64)
+    return haversine_km(origins[:, None, 0], origins[:, None, 1], destinations[None, :, 0], destinations[None, :, 1])
+
+def _unit_vectors(coords):
+    """[lat, lon] degrees to points on the unit sphere, where chord order equals great-circle order"""
+    lat, lon = np.radians(np.asarray(coords, dtype=np.float64)).T
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+def nearest_depots(depot_coords, demand_coords, k=8):
+    """Indices (n_demand, k) of the k nearest depots per demand point, via a KD-tree"""
+    k = min(k, len(depot_coords))
+    _, index = cKDTree(_unit_vectors(depot_coords)).query(_unit_vectors(demand_coords), k=k)
+    return index.reshape(len(demand_coords), k)
+
+class DepotAllocator:
+    """Ships inventory from located depots to demand points at minimum travel cost
+
+    Each resource is a transportation problem: deliver as much demand as
+    the depots can supply, preferring higher-priority demand points, and
+    among equal deliveries minimise unit-kilometres. Candidate routes are
+    either every depot-demand pair or, with k_nearest, the k nearest
+    depots per demand point found with a KD-tree, which keeps the linear
+    program sparse for thousands of depots and demand points.
+    """
+
+    def __init__(self, depot_names, depot_coords, depot_stock, resource_names):
+        self.depot_names = list(depot_names)
+        self.depot_coords = np.asarray(depot_coords, dtype=np.float64).reshape(-1, 2)
+        self.depot_stock = np.asarray(depot_stock, dtype=np.int64).reshape(len(self.depot_names), -1)
+        self.resource_names = list(resource_names)
+
+    @classmethod
+    def from_pool(cls, available_resources, depot_coords):
+        """Split one national inventory evenly across depots given as {name: [lat, lon]}"""
+        names = list(depot_coords)
+        totals = np.array(list(available_resources.values()), dtype=np.int64)
+        shares = np.tile(totals // len(names), (len(names), 1))
+        shares[0] += totals - shares.sum(axis=0)  # Remainder to the first depot
+        return cls(names, [depot_coords[name] for name in names], shares, list(available_resources))
+
+    def allocate(self, demand_names, demand_coords, needs, priority=None, k_nearest=None):
+        """Solve the transportation problem for every resource
+
+        needs is (demand points x resources) in resource_names order and
+        priority an optional weight per demand point. Returns delivered and
+        unmet matrices, the per-depot remaining stock and a shipments frame
+        (depot, destination, resource, quantity, distance_km).
+        """
+        start = time.perf_counter()
+        demand_coords = np.asarray(demand_coords, dtype=np.float64).reshape(-1, 2)
+        needs = np.asarray(needs, dtype=np.int64).reshape(len(demand_coords), len(self.resource_names))
+        n_depots, n_demand = len(self.depot_names), len(demand_coords)
+
+        # Candidate routes as (depot, demand) pairs
+        if k_nearest is not None and k_nearest < n_depots:
+            depot_index = nearest_depots(self.depot_coords, demand_coords, k_nearest).ravel()
+            demand_index = np.repeat(np.arange(n_demand), min(k_nearest, n_depots))
+        else:
+            depot_index = np.tile(np.arange(n_depots), n_demand)
+            demand_index = np.repeat(np.arange(n_demand), n_depots)
+        distance = haversine_km(self.depot_coords[depot_index, 0], self.depot_coords[depot_index, 1],
+                                demand_coords[demand_index, 0], demand_coords[demand_index, 1])
+
+        # Delivering any unit must beat every route length, and more to higher
+        # priority demand where stock is short: weight 1..2 scaled past the longest route
+        priority = np.ones(n_demand) if priority is None else np.asarray(priority, dtype=np.float64)
+        low, high = priority.min(initial=0.0), priority.max(initial=0.0)
+        weight = 1 + ((priority - low) / (high - low) if high > low else np.zeros(n_demand))
+        cost = distance - (distance.max(initial=0.0) + 1.0) * weight[demand_index]
+
+        # One constraint row per depot (supply) and per demand point (need); shared by all resources
+        n_routes = len(distance)
+        routes = np.arange(n_routes)
+        constraints = sparse.vstack([
+            sparse.csr_matrix((np.ones(n_routes), (depot_index, routes)), shape=(n_depots, n_routes)),
+            sparse.csr_matrix((np.ones(n_routes), (demand_index, routes)), shape=(n_demand, n_routes))
+        ]).tocsr()
+
+        delivered = np.zeros_like(needs)
+        remaining = self.depot_stock.copy()
+        shipments = []
+        for r, resource in enumerate(self.resource_names):
+            if needs[:, r].sum() == 0 or self.depot_stock[:, r].sum() == 0:
+                continue
+            limits = np.concatenate([self.depot_stock[:, r], needs[:, r]]).astype(np.float64)
+            result = linprog(cost, A_ub=constraints, b_ub=limits, bounds=(0, None), method='highs')
+            if result.status != 0:
+                raise ValueError(f"Transportation problem for {resource} failed: {result.message}")
+
+            flow = np.rint(result.x).astype(np.int64)  # Vertex solutions are integral
+            used = flow > 0
+            np.add.at(delivered[:, r], demand_index[used], flow[used])
+            np.subtract.at(remaining[:, r], depot_index[used], flow[used])
+            shipments.append(pd.DataFrame({
+                'depot': np.asarray(self.depot_names, dtype=object)[depot_index[used]],
+                'destination': np.asarray(list(demand_names), dtype=object)[demand_index[used]],
+                'resource': resource,
+                'quantity': flow[used],
+                'distance_km': distance[used]
+            }))
+
+        shipments = pd.concat(shipments, ignore_index=True) if shipments else pd.DataFrame(
+            columns=['depot', 'destination', 'resource', 'quantity', 'distance_km'])
+        elapsed = time.perf_counter() - start
+        logger.info(f"Allocated {n_depots} depots to {n_demand} demand points over {n_routes} routes in {elapsed:.2f}s")
+        return {
+            'delivered': delivered,
+            'unmet': needs - delivered,
+            'remaining_stock': remaining,
+            'shipments': shipments,
+            'unit_km': float((shipments['quantity'] * shipments['distance_km']).sum()),
+            'routes': n_routes,
+            'seconds': elapsed
+        }
+
+def benchmark(n_depots=2000, n_demand=3000, k_nearest=8, seed=42):
+    """Random depots and demand points over India, six resources"""
+    rng = np.random.default_rng(seed)
+    depots = np.column_stack([rng.uniform(8, 35, n_depots), rng.uniform(68, 97, n_depots)])
+    demand = np.column_stack([rng.uniform(8, 35, n_demand), rng.uniform(68, 97, n_demand)])
+    needs = rng.integers(0, 100, size=(n_demand, 6))
+    stock = rng.integers(0, 120, size=(n_depots, 6))
+
+    allocator = DepotAllocator([f"D{i}" for i in range(n_depots)], depots, stock, [f"R{r}" for r in range(6)])
+    result = allocator.allocate([f"P{j}" for j in range(n_demand)], demand, needs,
+                                priority=rng.uniform(0, 1, n_demand), k_nearest=k_nearest)
+    return {
+        'routes': result['routes'],
+        'seconds': result['seconds'],
+        'fill_rate': float(result['delivered'].sum() / needs.sum()),
+        'mean_km_per_unit': result['unit_km'] / max(1, int(result['delivered'].sum()))
+    }
+
+if __name__ == "__main__":
+    print(benchmark())
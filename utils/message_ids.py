@@ -0,0 +1,61 @@
+import base64
+import os
+import threading
+import time
+from datetime import datetime
+
+# Crockford base32 (no I, L, O, U) keeps IDs unambiguous when read back over SMS
+_RFC4648 = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+_CROCKFORD = b'0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_ENCODE = bytes.maketrans(_RFC4648, _CROCKFORD)
+_DECODE = bytes.maketrans(_CROCKFORD, _RFC4648)
+
+_RANDOM_BITS = 80
+_RANDOM_MASK = (1 << _RANDOM_BITS) - 1
+
+class MessageIdGenerator:
+    """ULID-style message IDs: 48-bit millisecond timestamp + 80-bit random tail
+
+    IDs are 26 Crockford base32 characters and sort lexicographically by
+    creation time. Within one millisecond the random tail is incremented,
+    so IDs from one process are strictly increasing. Each process starts
+    from fresh random bits (re-seeded after fork), which keeps IDs from
+    concurrent workers apart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reseed()
+
+    def _reseed(self):
+        self._last_ms = -1
+        self._tail = 0
+
+    def new_id(self):
+        """Return the next ID"""
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._tail = int.from_bytes(os.urandom(10), 'big')
+            else:
+                # Same millisecond (or clock stepped back): stay monotonic
+                self._tail = (self._tail + 1) & _RANDOM_MASK
+                if self._tail == 0:
+                    self._last_ms += 1
+            value = (self._last_ms << _RANDOM_BITS) | self._tail
+        return base64.b32encode(value.to_bytes(16, 'big'))[:26].translate(_ENCODE).decode('ascii')
+
+_generator = MessageIdGenerator()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_generator._reseed)
+
+def new_message_id():
+    """Generate a unique, time-sortable message ID"""
+    return _generator.new_id()
+
+def message_id_timestamp(message_id):
+    """Recover the creation time encoded in an ID (prefixes like GLOB_ are ignored)"""
+    encoded = message_id.rsplit('_', 1)[-1].encode('ascii').upper().translate(_DECODE)
+    value = int.from_bytes(base64.b32decode(encoded + b'======')[:16], 'big')
+    return datetime.fromtimestamp((value >> _RANDOM_BITS) / 1000)
@@ -1,42 +1,227 @@
 import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_sample_weight
 import joblib
+import copy
+import hashlib
+import io
+import json
 import logging
 import os
+import sys
+import time
 from datetime import datetime
 from twilio.rest import Client
 import uuid
+from utils.columnar import ColumnarDataset, convert_csv, open_columnar
+from utils.risk_grid import RiskGrid
+from utils.synthetic_data import FEATURE_COLUMNS, generate_samples
+from utils.tree_engine import CompiledForest
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when the layout of the saved artifact changes so old files are retrained
+ARTIFACT_VERSION = 4
+
+def _file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's raw bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _frame_digest(X, y):
+    """SHA-256 of in-memory training features and labels"""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(pd.DataFrame(X), index=False).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).values.tobytes())
+    return digest.hexdigest()
+
+def _array_digest(X, y):
+    """SHA-256 of contiguous feature and label arrays, hashed without copying"""
+    digest = hashlib.sha256()
+    digest.update(memoryview(np.ascontiguousarray(X)).cast('B'))
+    digest.update(memoryview(np.ascontiguousarray(y)).cast('B'))
+    return digest.hexdigest()
+
+def _peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux and the BSDs kilobytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def _parse_max_samples(value):
+    """DISASTER_TRAIN_MAX_SAMPLES as sklearn's max_samples: a row count, a fraction, or None for all rows"""
+    if not value:
+        return None
+    return float(value) if '.' in value else int(value)
+
+def _count_rows(source, chunk_size=1 << 20):
+    """Count data rows (lines minus the header) in a CSV path or binary buffer"""
+    f = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        lines = 0
+        last = b'\n'
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+        if last != b'\n':
+            lines += 1  # Final line without a trailing newline
+        return max(lines - 1, 0)
+    finally:
+        if f is source:
+            f.seek(0)
+        else:
+            f.close()
+
 class DisasterPredictor:
-    def __init__(self):
+    def __init__(self, inference_backend=None, load=True):
         self.model = None
+        self._compiled = None
+        self._grid = None
+        # 'sklearn' uses predict_proba, 'compiled' uses the flat-array CompiledForest
+        # for small batches, where sklearn's per-call overhead dominates, and 'grid'
+        # interpolates a precomputed RiskGrid (forest only outside its bounds)
+        self.inference_backend = inference_backend or os.environ.get('DISASTER_INFERENCE_BACKEND', 'sklearn')
+        self.compiled_max_rows = 512
+        self.grid_shape = None  # Points per feature for the risk grid, None for the defaults
+        self.grid_path = 'models/risk_grid.npz'
         self.scaler = StandardScaler()
+        self.feature_mean = None  # Frozen scaler parameters, set after training or loading
+        self.feature_scale = None
         self.feature_columns = ['rainfall', 'temperature', 'seismic_activity', 'wind_speed']
         self.disaster_types = ['flood', 'earthquake', 'cyclone', 'landslide']
+        self.model_params = {
+            'n_estimators': 200,
+            'max_depth': 15,
+            'class_weight': 'balanced',
+            'random_state': 42
+        }
+        # Rows bootstrapped per tree by train_large (count or fraction), None for all rows
+        self.max_samples = _parse_max_samples(os.environ.get('DISASTER_TRAIN_MAX_SAMPLES'))
         self.contacts_data = pd.DataFrame()
         self.model_path = 'models/disaster_model.joblib'
+        self.training_data_path = 'data/training_data.csv'
+        self.observations_path = 'data/observations.csv'
+        self.model_key = None  # Identifies the exact model, including incremental updates
+        self.base_key = None  # cache_key of the full training run the model started from
+        self.model_version = 0  # Bumped by every retrain and update, never reset
+        self.updates = []
+        self.training_rows = None  # Rows the base forest was fitted on
+        self.observation_rows = None  # Rows of observations_path the model includes (trees or pending), None if not trained on them
+        self.min_update_rows = 50  # Smaller update batches wait in pending until this many rows arrive
+        self.pending = None  # (features, labels) recorded but not yet grown into trees
+        self.model_source = None
 
         # Create models directory if it doesn't exist
         os.makedirs('models', exist_ok=True)
 
-        # Try to load training data and train model
+        # load=False gives an empty predictor, e.g. to train a replacement model
+        if not load:
+            return
+
+        # Reuse the saved model when it was built from the same data and settings
+        if not self.load_cached():
+            self.train_default()
+
+        logger.info(f"DisasterPredictor ready (source: {self.model_source}, key: {self.model_key[:12]})")
+
+    def default_training_digest(self):
+        """Digest of the default training data: the training CSV, or the generated sample set"""
+        dataset = open_columnar(self.training_data_path)
+        if dataset is not None:
+            return dataset.source_digest  # Recorded at conversion, no need to rehash the CSV
         try:
-            data = pd.read_csv('data/training_data.csv')
-            logger.info("Loading training data from CSV")
-            X = data[self.feature_columns]
-            y = data['disaster_type']
-            self.train(X, y)
+            return _file_digest(self.training_data_path)
+        except OSError as e:
+            logger.error(f"Could not read training data: {e}")
+            _, _, data_digest = self.load_training_arrays(self.generate_sample_data())
+            return data_digest
+
+    def load_cached(self):
+        """Load the saved model if it was trained on the default data with the current settings
+
+        The key covers the training data only. Observations recorded since
+        the artifact was saved are replayed as updates, so a restart keeps
+        the incrementally updated model instead of retraining.
+        """
+        if not self.load_model(expected_key=self.cache_key(self.default_training_digest(), self.training_params())):
+            return False
+        if self.replay_observations() is None:
+            logger.info("Observations file no longer matches the saved model, retraining")
+            return False
+        return True
+
+    def replay_observations(self):
+        """Apply rows of observations_path the model does not include yet
+
+        Returns the number of rows replayed, or None when the file holds
+        fewer rows than the model was built from (it was replaced or
+        truncated) and a full retrain is needed. Models not trained on the
+        observations (observation_rows is None) are left alone.
+        """
+        if self.observation_rows is None:
+            return 0
+        recorded = self.load_observations()
+        total = 0 if recorded is None else len(recorded[1])
+        if total < self.observation_rows:
+            return None
+        if total == self.observation_rows:
+            return 0
+        X, y = recorded[0][self.observation_rows:], recorded[1][self.observation_rows:]
+        logger.info(f"Replaying {len(y)} recorded observations")
+        self.update(X, y, record=False)
+        return len(y)
+
+    def train_default(self, **options):
+        """Train with train_large on the training data (columnar copy, else chunked CSV) plus observations
+
+        Rows recorded by update() are merged in, so a full retrain keeps
+        them; the artifact key still covers the training data only (see
+        load_cached). Falls back to generated sample data when the training data
+        cannot be read. options are passed on to train_large.
+        """
+        try:
+            metrics = self.train_large(self.training_data_path, observations=True, **options)
         except Exception as e:
             logger.error(f"Could not load training data: {e}")
             logger.info("Generating sample data for training")
-            X, y = self.generate_sample_data()
-            self.train(X, y)
+            metrics = self.train_large(self.generate_sample_data(), observations=True, **options)
+            self.model_source = 'sample'
+        return metrics
+
+    def training_params(self, max_samples=None):
+        """Forest parameters used by train_large, max_samples defaulting to the configured value"""
+        params = dict(self.model_params)
+        max_samples = self.max_samples if max_samples is None else max_samples
+        if max_samples is not None:
+            params['max_samples'] = max_samples
+        return params
+
+    def cache_key(self, data_digest, model_params=None):
+        """Build the artifact key from the training data digest and model settings"""
+        payload = json.dumps({
+            'artifact_version': ARTIFACT_VERSION,
+            'data': data_digest,
+            'sklearn_version': sklearn.__version__,
+            'params': model_params or self.model_params,
+            'feature_columns': self.feature_columns,
+            'disaster_types': self.disaster_types
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
     def initialize_twilio(self):
         """Initialize Twilio client with proper error handling"""
@@ -73,8 +258,13 @@ class DisasterPredictor:
             if not os.path.exists(data_path):
                 data_path = 'data/training_data.csv'
 
-            print(f"Loading training data from: {data_path}")
-            data = pd.read_csv(data_path)
+            dataset = open_columnar(data_path)
+            if dataset is not None:
+                print(f"Loading training data from: {dataset.path}")
+                data = dataset.to_frame()
+            else:
+                print(f"Loading training data from: {data_path}")
+                data = pd.read_csv(data_path)
 
             # Store contact information
             if 'phone_number' in data.columns and 'location' in data.columns:
@@ -89,26 +279,34 @@ class DisasterPredictor:
             print(f"Error loading training data: {str(e)}")
             return None
 
-    def train(self, X, y):
+    def train(self, X, y, data_digest=None):
         """Train the model with input data"""
         logger.info(f"Training model with data shape: {X.shape}")
+        if data_digest is None:
+            data_digest = _frame_digest(X, y)
 
-        # Preprocess input data
-        X_scaled = self.scaler.fit_transform(X)
+        # Preprocess input data (fit on the raw matrix so batch arrays transform cleanly)
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(np.asarray(X, dtype=np.float64))
 
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X_scaled, y, test_size=0.2, random_state=42
         )
 
-        # Initialize and train model
-        self.model = RandomForestClassifier(
-            n_estimators=200,
-            max_depth=15,
-            class_weight='balanced',
-            random_state=42
-        )
-        self.model.fit(X_train, y_train)
+        # Initialize and train model, building trees on all cores
+        model = RandomForestClassifier(**self.model_params, n_jobs=-1)
+        model.fit(X_train, y_train)
+        model.set_params(n_jobs=None)  # Single-threaded inference avoids per-call pool overhead
+
+        # Publish the fitted scaler and model together, then freeze the preprocessing
+        self.scaler, self.model = scaler, model
+        self._freeze_preprocessing()
+        self.model_key = self.base_key = self.cache_key(data_digest)
+        self.model_version, self.updates = self.model_version + 1, []
+        self.training_rows, self.observation_rows, self.pending = len(X_train), None, None
+        self.model_source = 'trained'
+        self._compiled = None
 
         # Calculate metrics
         train_score = self.model.score(X_train, y_train)
@@ -116,6 +314,8 @@ class DisasterPredictor:
 
         # Save the model
         self.save_model()
+        if self.inference_backend == 'grid':
+            self.risk_grid()  # Build now, in the training process, not on the first request
 
         logger.info(f"Model trained successfully. Train accuracy: {train_score:.2f}, Test accuracy: {test_score:.2f}")
         return {
@@ -125,28 +325,337 @@ class DisasterPredictor:
                                     self.model.feature_importances_))
         }
 
-    def predict(self, input_data):
-        """Make predictions"""
+    def ingest_training_data(self, csv_path=None, chunksize=500000):
+        """Convert a training CSV (default: training_data_path) to the columnar store
+
+        Later loads of that CSV memory-map the converted copy instead of
+        parsing text, until the CSV changes again.
+        """
+        return convert_csv(csv_path or self.training_data_path, chunksize=chunksize)
+
+    def load_training_arrays(self, source, chunksize=500000):
+        """Feature matrix, labels and data digest from a columnar directory, a CSV or (X, y)
+
+        A columnar directory, or a CSV with an up-to-date columnar copy, is
+        memory-mapped; a CSV path or file object goes through the chunked
+        CSV reader, and in-memory (X, y) data is copied into compact arrays.
+        """
+        if isinstance(source, tuple):
+            X, y = source
+            if isinstance(X, pd.DataFrame):
+                X = X[self.feature_columns]
+            X = np.array(X, dtype=np.float32).reshape(-1, len(self.feature_columns))
+            y = np.array(y, dtype=np.int32)
+            return X, y, _array_digest(X, y)
+        if isinstance(source, (str, os.PathLike)):
+            dataset = ColumnarDataset(source) if os.path.isdir(source) else open_columnar(source)
+            if dataset is not None:
+                X = dataset.matrix(self.feature_columns)
+                # The column is a read-only memory map; train_large shuffles the labels in place
+                y = np.array(dataset['disaster_type'], dtype=np.int32, copy=True)
+                return X, y, dataset.source_digest
+            X, y = self.load_training_csv(source, chunksize)
+            return X, y, _file_digest(source)
+        X, y = self.load_training_csv(source, chunksize)
+        return X, y, _array_digest(X, y)
+
+    def load_observations(self):
+        """Features, labels and digest of the rows recorded by update(), or None if there are none
+
+        The file is read once into memory, so the digest always matches the
+        parsed rows even while updates keep appending to it.
+        """
+        try:
+            with open(self.observations_path, 'rb') as f:
+                contents = f.read()
+        except FileNotFoundError:
+            return None
+        contents = contents[:contents.rfind(b'\n') + 1]  # Drop a line still being appended
+        X, y = self.load_training_csv(io.BytesIO(contents))
+        return X, y, hashlib.sha256(contents).hexdigest()
+
+    def load_training_csv(self, source, chunksize=500000):
+        """Read a training CSV in chunks into compact arrays
+
+        Only the feature columns and disaster_type are parsed, as float32 and
+        int32. Rows are counted first so the output arrays are allocated once
+        and filled chunk by chunk, keeping peak memory close to the result
+        size. source may be a path or a seekable binary file object.
+        """
+        n_rows = _count_rows(source)
+        X = np.empty((n_rows, len(self.feature_columns)), dtype=np.float32)
+        y = np.empty(n_rows, dtype=np.int32)
+
+        dtypes = {col: np.float32 for col in self.feature_columns}
+        dtypes['disaster_type'] = np.int32
+        offset = 0
+        for chunk in pd.read_csv(source, usecols=self.feature_columns + ['disaster_type'],
+                                 dtype=dtypes, chunksize=chunksize):
+            end = offset + len(chunk)
+            X[offset:end] = chunk[self.feature_columns].to_numpy()
+            y[offset:end] = chunk['disaster_type'].to_numpy()
+            offset = end
+
+        # Blank lines are counted but not parsed
+        return X[:offset], y[:offset]
+
+    def train_large(self, source, chunksize=500000, max_samples=None, eval_rows=100000, observations=False):
+        """Memory-bounded training mode for large CSV archives
+
+        Loads the data with load_training_arrays (memory-mapped when a
+        columnar copy exists, chunked CSV otherwise, or an in-memory (X, y)
+        pair), shuffles and scales the float32 arrays in place, and fits the
+        forest on all cores from views of the same buffer (no train/test
+        copies). max_samples optionally bootstraps a subsample per tree
+        (default: DISASTER_TRAIN_MAX_SAMPLES); accuracy is estimated on up to
+        eval_rows rows. observations=True appends the rows recorded by
+        update(). Returns the usual metrics plus rows, wall time and peak
+        memory.
+        """
+        start = time.perf_counter()
+        X, y, data_digest = self.load_training_arrays(source, chunksize)
+        observation_rows, observations_digest = None, None
+        if observations:
+            recorded = self.load_observations()
+            observation_rows = 0 if recorded is None else len(recorded[1])
+            if observation_rows:
+                X, y = np.concatenate([X, recorded[0]]), np.concatenate([y, recorded[1]])
+                observations_digest = recorded[2]
+        load_seconds = time.perf_counter() - start
+        logger.info(f"Loaded {len(X)} training rows in {load_seconds:.1f}s")
+
+        # Same permutation for features and labels, applied in place
+        for array in (X, y):
+            np.random.default_rng(42).shuffle(array)
+
+        scaler = StandardScaler()
+        scaler.fit(X)
+        X = scaler.transform(X, copy=False)
+
+        n_train = int(len(X) * 0.8)
+        X_train, X_test = X[:n_train], X[n_train:]
+        y_train, y_test = y[:n_train], y[n_train:]
+
+        model_params = self.training_params(max_samples)
+        fit_params = dict(model_params)
+        if isinstance(fit_params.get('max_samples'), int):
+            fit_params['max_samples'] = min(fit_params['max_samples'], n_train)  # Small data sets use every row
+        model = RandomForestClassifier(**fit_params, n_jobs=-1)
+        model.fit(X_train, y_train)
+        model.set_params(n_jobs=None)
+
+        train_score = model.score(X_train[:eval_rows], y_train[:eval_rows])
+        test_score = model.score(X_test[:eval_rows], y_test[:eval_rows])
+
+        self.scaler, self.model = scaler, model
+        self._freeze_preprocessing()
+        # The artifact key covers the training data; the observations included
+        # are identified by model_key and observation_rows (see load_cached)
+        self.model_key = self.base_key = self.cache_key(data_digest, model_params)
+        if observations_digest:
+            self.model_key = hashlib.sha256(f"{self.base_key}:{observations_digest}".encode('utf-8')).hexdigest()
+        self.model_version, self.updates = self.model_version + 1, []
+        self.training_rows, self.observation_rows, self.pending = n_train, observation_rows, None
+        self.model_source = 'trained'
+        self._compiled = None
+        self.save_model()
+        if self.inference_backend == 'grid':
+            self.risk_grid()
+
+        metrics = {
+            'train_accuracy': train_score,
+            'test_accuracy': test_score,
+            'feature_importance': dict(zip(self.feature_columns, model.feature_importances_)),
+            'rows': len(X),
+            'observation_rows': observation_rows or 0,
+            'load_seconds': load_seconds,
+            'wall_seconds': time.perf_counter() - start,
+            'peak_rss_mb': _peak_rss_mb()
+        }
+        logger.info(f"Large training finished: {len(X)} rows, {metrics['wall_seconds']:.1f}s, "
+                    f"peak RSS {metrics['peak_rss_mb']} MB, test accuracy {test_score:.2f}")
+        return metrics
+
+    def update(self, X, y, n_trees=None, record=True):
+        """Incrementally update the model with newly labeled observations
+
+        Grows extra trees on the new rows only (warm start), so the cost
+        depends on the batch size rather than the full history. n_trees
+        defaults to the base forest's size scaled by the batch's share of
+        its training rows, so a batch counts about as much as the same
+        number of training rows. Batches under min_update_rows are kept in
+        pending and grown together with later rows: trees fitted on a
+        handful of rows are single leaves that vote for every input alike.
+        The frozen preprocessing is reused, the existing trees are shared
+        rather than copied, and the previous model object is left
+        untouched, so a predictor already being served is never modified
+        mid-request. Each update bumps model_version, derives a new
+        model_key, is recorded in the artifact and (with record=True)
+        appends the rows to observations_path for the next full retrain.
+        """
         if self.model is None:
             raise ValueError("Model not trained")
 
-        # Preprocess input data
-        X_scaled = self.scaler.transform(input_data[self.feature_columns])
+        if isinstance(X, pd.DataFrame):
+            raw = X[self.feature_columns].to_numpy(dtype=np.float64)
+        else:
+            raw = np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_columns))
+        y = np.asarray(y, dtype=np.int64)
+        if len(raw) == 0 or len(raw) != len(y):
+            raise ValueError("Expected a non-empty batch with one label per row")
+        classes = np.asarray(self.model.classes_)
+        unknown = np.setdiff1d(y, classes)
+        if len(unknown):
+            raise ValueError(f"Unknown disaster_type labels: {unknown.tolist()}")
+
+        start = time.perf_counter()
+        batch_rows = len(y)
+        if record:
+            observations = pd.DataFrame(raw, columns=self.feature_columns)
+            observations['disaster_type'] = y
+            observations.to_csv(self.observations_path, mode='a', index=False,
+                                header=not os.path.exists(self.observations_path))
+        if self.observation_rows is not None:
+            self.observation_rows += batch_rows
+
+        if self.pending is not None:
+            raw = np.vstack([self.pending[0], raw])
+            y = np.concatenate([self.pending[1], y])
+        if len(y) < self.min_update_rows:
+            self.pending = (raw, y)
+            logger.info(f"Holding {len(y)} observations until {self.min_update_rows} are available")
+            return {
+                'model_version': self.model_version,
+                'model_key': self.model_key,
+                'rows': batch_rows,
+                'pending': len(y),
+                'trees': len(self.model.estimators_),
+                'update_seconds': time.perf_counter() - start
+            }
+        self.pending = None
+
+        if n_trees is None:
+            n_trees = max(1, round(self.model_params['n_estimators'] * len(y) / self.training_rows))
+        X_scaled = self.preprocess_data(raw)
+
+        # One zero-weight anchor row per class keeps the new trees' class
+        # layout identical to the existing ones even if the batch lacks a class.
+        # class_weight='balanced' would divide by those zero weights, so the
+        # batch is balanced over the classes it actually contains instead.
+        X_fit = np.vstack([X_scaled, np.zeros((len(classes), X_scaled.shape[1]))])
+        y_fit = np.concatenate([y, classes])
+        batch_weights = compute_sample_weight('balanced', y) if self.model.class_weight else np.ones(len(y))
+        weights = np.concatenate([batch_weights, np.zeros(len(classes))])
+
+        model = copy.copy(self.model)
+        model.estimators_ = list(self.model.estimators_)
+        model.set_params(warm_start=True, class_weight=None,
+                         n_estimators=len(model.estimators_) + n_trees)
+        model.fit(X_fit, y_fit, sample_weight=weights)
+        model.set_params(warm_start=False, class_weight=self.model.class_weight)
+
+        data_digest = _array_digest(raw, y)
+        self.model = model
+        self._compiled = None
+        self.model_version += 1
+        self.model_key = hashlib.sha256(
+            f"{self.model_key}:{data_digest}:{n_trees}".encode('utf-8')
+        ).hexdigest()
+        self.updates = self.updates + [{
+            'version': self.model_version,
+            'rows': len(y),
+            'trees': n_trees,
+            'data': data_digest,
+            'updated_at': datetime.now().isoformat()
+        }]
+        self.save_model()
+        if self.inference_backend == 'grid':
+            self.risk_grid()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Model updated to version {self.model_version} with {len(y)} rows "
+                    f"(+{n_trees} trees, {len(model.estimators_)} total) in {elapsed:.2f}s")
+        return {
+            'model_version': self.model_version,
+            'model_key': self.model_key,
+            'rows': batch_rows,
+            'pending': 0,
+            'trees': len(model.estimators_),
+            'update_seconds': elapsed
+        }
 
-        # Get prediction probabilities
-        probabilities = self.model.predict_proba(X_scaled)[0]
+    def predict(self, input_data):
+        """Make predictions"""
+        probabilities, _ = self.predict_batch(input_data)
+        probabilities = probabilities[0]
         logger.info(f"Raw prediction probabilities: {probabilities}")
 
         # Create dictionary mapping disaster types to their probabilities
-        predictions = {}
-        for disaster_type, prob in zip(self.disaster_types, probabilities):
-            predictions[disaster_type] = float(prob)
-            logger.info(f"Prediction for {disaster_type}: {prob}")
+        predictions = dict(zip(self.disaster_types, probabilities.tolist()))
 
         # Sort predictions by probability in descending order
         predictions = dict(sorted(predictions.items(), key=lambda x: x[1], reverse=True))
         return predictions
 
+    def predict_batch(self, input_data):
+        """Score many readings at once
+
+        Accepts a DataFrame with the feature columns or an (N, 4) array in
+        feature_columns order. Returns an (N, 4) probability matrix ordered as
+        disaster_types and an array of the most likely disaster type per row.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained")
+
+        if self.inference_backend == 'grid':
+            X = self.feature_matrix(input_data)
+            grid = self.risk_grid()
+            inside = grid.in_bounds(X)
+            probabilities = np.empty((len(X), grid.n_classes))
+            probabilities[inside] = grid.predict_proba(X[inside])
+            if not inside.all():
+                probabilities[~inside] = self.model.predict_proba(self.preprocess_data(X[~inside]))
+            labels = np.asarray(self.disaster_types)[probabilities.argmax(axis=1)]
+            return probabilities, labels
+
+        # One frozen affine transform and one model call for the whole batch
+        X_scaled = self.preprocess_data(input_data)
+        if self.inference_backend == 'compiled' and len(X_scaled) <= self.compiled_max_rows:
+            probabilities = self.compiled_model().predict_proba(X_scaled)
+        else:
+            probabilities = self.model.predict_proba(X_scaled)
+        labels = np.asarray(self.disaster_types)[probabilities.argmax(axis=1)]
+        return probabilities, labels
+
+    def risk_grid(self):
+        """Return the lookup grid for the current model, loading or building it on first use
+
+        A grid saved at grid_path is reused when it was built for the same
+        model_key; otherwise the forest is evaluated over the grid and saved.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained")
+        if self._grid is None or self._grid.model_key != self.model_key:
+            grid = None
+            if os.path.exists(self.grid_path):
+                try:
+                    grid = RiskGrid.load(self.grid_path)
+                except Exception as e:
+                    logger.error(f"Error loading risk grid: {e}")
+            if grid is None or grid.model_key != self.model_key:
+                grid = RiskGrid.build(self, shape=self.grid_shape)
+                grid.save(self.grid_path)
+            self._grid = grid
+        return self._grid
+
+    def compiled_model(self):
+        """Return the flat-array version of the current forest, building it on first use"""
+        if self.model is None:
+            raise ValueError("Model not trained")
+        if self._compiled is None:
+            self._compiled = CompiledForest(self.model)
+        return self._compiled
+
     def predict_and_alert(self, input_data, location):
         """Make predictions and send alerts if risk is high"""
         if self.model is None:
@@ -155,15 +664,11 @@ class DisasterPredictor:
             if data is not None:
                 self.train(data[self.feature_columns], data['disaster_type'])
 
-        # Preprocess input data
-        X = self.preprocess_data(input_data)
-
-        # Get prediction probabilities
-        probabilities = self.model.predict_proba(X)
+        # Same preprocessing and inference path as predict
+        probabilities, _ = self.predict_batch(input_data)
 
         # Map predictions to disaster types
-        disaster_types = ['flood', 'earthquake', 'cyclone', 'landslide']
-        predictions = dict(zip(disaster_types, probabilities[0]))
+        predictions = dict(zip(self.disaster_types, probabilities[0].tolist()))
 
         # Print predictions for debugging
         print(f"Predictions for {location}:", predictions)
@@ -278,26 +783,54 @@ class DisasterPredictor:
     def save_model(self):
         """Save the trained model"""
         try:
+            # Write to a temporary file and rename so readers never see a partial artifact
+            tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
             joblib.dump({
+                'artifact_version': ARTIFACT_VERSION,
+                'cache_key': self.base_key,
+                'model_key': self.model_key,
+                'model_version': self.model_version,
+                'updates': self.updates,
+                'training_rows': self.training_rows,
+                # Pending rows are not in the trees; load_cached replays them
+                'observation_rows': (self.observation_rows - len(self.pending[1])
+                                     if self.observation_rows is not None and self.pending is not None
+                                     else self.observation_rows),
+                'saved_at': datetime.now().isoformat(),
                 'model': self.model,
                 'scaler': self.scaler,
+                'preprocessing': {'mean': self.feature_mean, 'scale': self.feature_scale},
                 'feature_columns': self.feature_columns,
                 'disaster_types': self.disaster_types
-            }, self.model_path)
+            }, tmp_path)
+            os.replace(tmp_path, self.model_path)
             logger.info("Model saved successfully")
         except Exception as e:
             logger.error(f"Error saving model: {e}")
 
-    def load_model(self):
-        """Load a trained model if it exists"""
+    def load_model(self, expected_key=None):
+        """Load a trained model if it exists and, when given, its key matches"""
         try:
             if os.path.exists(self.model_path):
                 saved_model = joblib.load(self.model_path)
+                if expected_key is not None and saved_model.get('cache_key') != expected_key:
+                    logger.info("Saved model is stale for the current training data, retraining")
+                    return False
                 self.model = saved_model['model']
                 self.scaler = saved_model['scaler']
+                self._freeze_preprocessing()
                 self.feature_columns = saved_model['feature_columns']
                 self.disaster_types = saved_model.get('disaster_types', 
                     ['flood', 'earthquake', 'cyclone', 'landslide'])
+                self.base_key = saved_model.get('cache_key')
+                self.model_key = saved_model.get('model_key', self.base_key)
+                self.model_version = saved_model.get('model_version', 0)
+                self.updates = saved_model.get('updates', [])
+                self.training_rows = saved_model['training_rows']
+                self.observation_rows = saved_model.get('observation_rows')
+                self.pending = None
+                self.model_source = 'cache'
+                self._compiled = None
                 logger.info("Model loaded successfully")
                 return True
         except Exception as e:
@@ -305,63 +838,46 @@ class DisasterPredictor:
         return False
 
     def preprocess_data(self, data):
-        """Preprocess input data"""
-        # Ensure all required features are present
-        for col in self.feature_columns:
-            if col not in data.columns:
-                raise ValueError(f"Missing required feature: {col}")
+        """Scale inference input with the preprocessing frozen at training time
+
+        Accepts a DataFrame with the feature columns or an (N, 4) array in
+        feature_columns order. Nothing is refit here, so the call is safe to
+        run concurrently and single rows are scaled like the training data.
+        """
+        if self.feature_mean is None:
+            raise ValueError("Model not trained")
+
+        X = self.feature_matrix(data)
+
+        # Same arithmetic as StandardScaler.transform, without its per-call validation
+        return (X - self.feature_mean) / self.feature_scale
+
+    def feature_matrix(self, data):
+        """Validate inference input and return the raw (N, 4) float64 feature matrix"""
+        if isinstance(data, pd.DataFrame):
+            # Ensure all required features are present
+            missing = [col for col in self.feature_columns if col not in data.columns]
+            if missing:
+                raise ValueError(f"Missing required features: {missing}")
+            X = data[self.feature_columns].to_numpy(dtype=np.float64)
+        else:
+            X = np.asarray(data, dtype=np.float64)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+            if X.ndim != 2 or X.shape[1] != len(self.feature_columns):
+                raise ValueError(
+                    f"Expected input of shape (N, {len(self.feature_columns)}), got {X.shape}"
+                )
+        return X
 
-        # Scale features
-        return self.scaler.fit_transform(data[self.feature_columns])
+    def _freeze_preprocessing(self):
+        """Snapshot the fitted scaler as read-only arrays used at inference"""
+        self.feature_mean = np.array(self.scaler.mean_, dtype=np.float64)
+        self.feature_scale = np.array(self.scaler.scale_, dtype=np.float64)
+        self.feature_mean.setflags(write=False)
+        self.feature_scale.setflags(write=False)
 
-    def generate_sample_data(self):
+    def generate_sample_data(self, n_per_class=250, seed=42):
         """Generate synthetic data for training"""
-        np.random.seed(42)
-        n_samples = 1000
-
-        # Initialize arrays for features
-        rainfall = np.zeros(n_samples)
-        temperature = np.zeros(n_samples)
-        seismic_activity = np.zeros(n_samples)
-        wind_speed = np.zeros(n_samples)
-        labels = np.zeros(n_samples)
-
-        # Generate data in chunks to ensure clear patterns
-        chunk_size = n_samples // 4
-
-        # Flood conditions (high rainfall)
-        rainfall[:chunk_size] = np.random.uniform(300, 500, chunk_size)
-        temperature[:chunk_size] = np.random.uniform(20, 30, chunk_size)
-        seismic_activity[:chunk_size] = np.random.uniform(0, 3, chunk_size)
-        wind_speed[:chunk_size] = np.random.uniform(0, 30, chunk_size)
-        labels[:chunk_size] = 0  # Flood
-
-        # Earthquake conditions (high seismic activity)
-        rainfall[chunk_size:2*chunk_size] = np.random.uniform(0, 100, chunk_size)
-        temperature[chunk_size:2*chunk_size] = np.random.uniform(15, 35, chunk_size)
-        seismic_activity[chunk_size:2*chunk_size] = np.random.uniform(7, 10, chunk_size)
-        wind_speed[chunk_size:2*chunk_size] = np.random.uniform(0, 30, chunk_size)
-        labels[chunk_size:2*chunk_size] = 1  # Earthquake
-
-        # Cyclone conditions (high wind speed)
-        rainfall[2*chunk_size:3*chunk_size] = np.random.uniform(100, 200, chunk_size)
-        temperature[2*chunk_size:3*chunk_size] = np.random.uniform(25, 35, chunk_size)
-        seismic_activity[2*chunk_size:3*chunk_size] = np.random.uniform(0, 3, chunk_size)
-        wind_speed[2*chunk_size:3*chunk_size] = np.random.uniform(80, 120, chunk_size)
-        labels[2*chunk_size:3*chunk_size] = 2  # Cyclone
-
-        # Landslide conditions (combination of rainfall and seismic)
-        rainfall[3*chunk_size:] = np.random.uniform(200, 300, chunk_size)
-        temperature[3*chunk_size:] = np.random.uniform(20, 30, chunk_size)
-        seismic_activity[3*chunk_size:] = np.random.uniform(4, 6, chunk_size)
-        wind_speed[3*chunk_size:] = np.random.uniform(0, 30, chunk_size)
-        labels[3*chunk_size:] = 3  # Landslide
-
-        X = pd.DataFrame({
-            'rainfall': rainfall,
-            'temperature': temperature,
-            'seismic_activity': seismic_activity,
-            'wind_speed': wind_speed
-        })
-
-        return X, labels
\ No newline at end of file
+        X, labels = generate_samples(n_per_class, seed=seed, noise=False)
+        return pd.DataFrame(X, columns=FEATURE_COLUMNS)[self.feature_columns], labels
\ No newline at end of file
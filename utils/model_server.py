@@ -0,0 +1,233 @@
+import copy
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from utils.ml_predictor import DisasterPredictor
+from utils.prediction_cache import PredictionCache
+from utils.process_context import mp_context
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _train_job(X, y, inference_backend, options=None):
+    """Build and train a fresh predictor; runs inside a worker process
+
+    With X left as None the default training data and recorded
+    observations are used; a CSV path or in-memory (X, y) data is trained
+    with train_large. The trained predictor is pickled back to the parent
+    as a finished bundle.
+    """
+    start = time.perf_counter()
+    candidate = DisasterPredictor(inference_backend=inference_backend, load=False)
+    if X is None:
+        metrics = candidate.train_default(**(options or {}))
+    elif isinstance(X, str):
+        metrics = candidate.train_large(X, **(options or {}))
+    else:
+        metrics = candidate.train_large((X, y), **(options or {}))
+    metrics['feature_importance'] = {k: float(v) for k, v in metrics['feature_importance'].items()}
+    metrics['train_seconds'] = time.perf_counter() - start
+    return candidate, metrics
+
+class ModelServer:
+    """Process-wide holder for the active DisasterPredictor
+
+    Requests read the current predictor reference once and use it for the
+    whole call, so a concurrent swap never mixes one model's scaler with
+    another's forest. Published predictors are never modified afterwards:
+    retraining builds a new one (in a worker process for background jobs)
+    and replaces the reference in a single assignment.
+    """
+
+    def __init__(self, predictor=None, background=False, inference_backend=None, cache=None):
+        self.cache = cache if cache is not None else PredictionCache.from_env()
+        self._swap_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._jobs = {}
+        self._executor = None
+        self._predictor = None
+        self.version = 0
+        self.inference_backend = inference_backend
+
+        if predictor is None:
+            predictor = DisasterPredictor(inference_backend=inference_backend, load=False)
+            if not predictor.load_cached():
+                if background:
+                    # Serve nothing until the first background training finishes
+                    predictor = None
+                    self.submit_retrain()
+                else:
+                    predictor.train_default()
+
+        if predictor is not None:
+            self.swap(predictor)
+
+    @property
+    def predictor(self):
+        """The active predictor, or None while the first model is still training"""
+        return self._predictor
+
+    @property
+    def ready(self):
+        return self._predictor is not None
+
+    def predict(self, input_data):
+        """Predict one reading, answering repeated (quantized) readings from the cache"""
+        predictor = self._predictor
+        if predictor is None:
+            raise ValueError("Model is still training")
+        if not self.cache.enabled:
+            return predictor.predict(input_data)
+
+        X = predictor.feature_matrix(input_data)
+        if len(X) != 1:
+            return predictor.predict(X)
+        bucket = self.cache.quantize(X[0])
+        result = self.cache.get(predictor.model_key, bucket)
+        if result is None:
+            # Predict the bucket itself so a cached answer never depends on which reading came first
+            result = predictor.predict(self.cache.bucket_values(bucket).reshape(1, -1))
+            self.cache.put(predictor.model_key, bucket, result)
+        return dict(result)
+
+    def predict_batch(self, input_data):
+        predictor = self._predictor
+        if predictor is None:
+            raise ValueError("Model is still training")
+        return predictor.predict_batch(input_data)
+
+    def swap(self, predictor):
+        """Atomically make predictor the active model"""
+        if predictor.model is None:
+            raise ValueError("Cannot serve an untrained predictor")
+        with self._swap_lock:
+            self._predictor = predictor
+            self.version += 1
+        # Entries are keyed by model_key, so this only frees memory early
+        self.cache.clear()
+        logger.info(f"Serving model version {self.version} (key: {predictor.model_key[:12]})")
+
+    def retrain(self, X, y):
+        """Train a replacement predictor in this thread, swap it in and return its metrics"""
+        candidate, metrics = _train_job(X, y, self.inference_backend)
+        self._publish_retrained(candidate)
+        return metrics
+
+    def update(self, X, y, n_trees=None):
+        """Apply an incremental update to a copy of the active predictor and swap it in
+
+        Updates are serialized so none is lost; serving continues on the
+        current predictor while the new trees are grown.
+        """
+        with self._update_lock:
+            predictor = self._predictor
+            if predictor is None:
+                raise ValueError("Model is still training")
+            candidate = copy.copy(predictor)
+            metrics = candidate.update(X, y, n_trees=n_trees)
+            self.swap(candidate)
+        return metrics
+
+    def submit_retrain(self, X=None, y=None, **options):
+        """Start retraining in a worker process and return its job ID
+
+        Serving continues on the current model; the new one is swapped in
+        when the job succeeds. X=None retrains on the default training data;
+        X may also be a CSV path or in-memory features with labels y. Every
+        job trains with train_large, which accepts options (chunksize,
+        max_samples, eval_rows).
+        """
+        job_id = uuid.uuid4().hex
+        with self._swap_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=mp_context(['utils.ml_predictor']))
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'rows': None if X is None or isinstance(X, str) else len(X),
+                'submitted_at': datetime.now().isoformat(),
+                'finished_at': None,
+                'version': None,
+                'metrics': None,
+                'error': None
+            }
+            future = self._executor.submit(_train_job, X, y, self.inference_backend, options)
+            self._jobs[job_id]['future'] = future
+        future.add_done_callback(lambda f: self._finish_job(job_id, f))
+        logger.info(f"Submitted retraining job {job_id}")
+        return job_id
+
+    def _finish_job(self, job_id, future):
+        job = self._jobs[job_id]
+        try:
+            candidate, metrics = future.result()
+            self._publish_retrained(candidate)
+            job.update(status='succeeded', metrics=metrics, version=self.version)
+            logger.info(f"Retraining job {job_id} finished: {metrics}")
+        except Exception as e:
+            job.update(status='failed', error=str(e))
+            logger.error(f"Retraining job {job_id} failed: {str(e)}")
+        job['finished_at'] = datetime.now().isoformat()
+
+    def _publish_retrained(self, candidate):
+        """Swap in a retrained predictor without losing updates or going back in version
+
+        Rows recorded after the job read the observations file are replayed
+        onto the candidate, so an update served while it was training is
+        not dropped, and its model_version continues from the served one.
+        Holding _update_lock keeps new rows from arriving in between.
+        """
+        with self._update_lock:
+            current = self._predictor
+            if current is not None and candidate.model_version <= current.model_version:
+                candidate.model_version = current.model_version + 1
+            if not candidate.replay_observations():
+                candidate.save_model()  # Record the renumbered version
+            self.swap(candidate)
+
+    def job_status(self, job_id):
+        """Status, timing and metrics for one retraining job, or None"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        status = {key: value for key, value in job.items() if key != 'future'}
+        if status['status'] == 'queued' and job['future'].running():
+            status['status'] = 'running'
+        return status
+
+    def status(self):
+        """Summary of the served model and all retraining jobs"""
+        predictor = self._predictor
+        return {
+            'ready': predictor is not None,
+            'version': self.version,
+            'model_key': predictor.model_key if predictor else None,
+            'model_version': predictor.model_version if predictor else None,
+            'model_source': predictor.model_source if predictor else None,
+            'cache': self.cache.stats(),
+            'jobs': [self.job_status(job_id) for job_id in list(self._jobs)]
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+_server = None
+_server_lock = threading.Lock()
+
+def get_model_server(background=False):
+    """Return the shared ModelServer, loading the model on first use only
+
+    With background=True a missing or stale model is trained in a worker
+    process instead of blocking the caller.
+    """
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = ModelServer(background=background)
+    return _server
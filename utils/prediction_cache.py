@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class PredictionCache:
+    """Thread-safe LRU cache with TTL for single-reading predictions
+
+    Keys are the model key plus the feature values quantized to a
+    resolution (one value for all features, or a per-feature sequence), so
+    readings within the same bucket share a result and a new model never
+    sees entries computed by an old one. maxsize=0 disables the cache.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300.0, resolution=0.01):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.resolution = np.asarray(resolution, dtype=np.float64)
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from PREDICTION_CACHE_SIZE, _TTL and _RESOLUTION"""
+        return cls(
+            maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+            ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 300)),
+            resolution=float(os.environ.get('PREDICTION_CACHE_RESOLUTION', 0.01))
+        )
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def quantize(self, row):
+        """Bucket index per feature for one reading"""
+        return tuple(np.rint(np.asarray(row, dtype=np.float64) / self.resolution).astype(np.int64).tolist())
+
+    def bucket_values(self, bucket):
+        """Representative feature values (the bucket centre) for a quantized key"""
+        return np.asarray(bucket, dtype=np.float64) * self.resolution
+
+    def get(self, model_key, bucket):
+        """Return the cached result for (model_key, bucket) or None"""
+        key = (model_key, bucket)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, model_key, bucket, result):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[(model_key, bucket)] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end((model_key, bucket))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+def benchmark(n_requests=2000, distinct=200, seed=42):
+    """Replay form-like repeated readings through ModelServer with and without the cache"""
+    import pandas as pd
+    from utils.model_server import ModelServer
+
+    rng = np.random.default_rng(seed)
+    pool = np.column_stack([
+        rng.integers(0, 51, distinct) * 10.0,   # rainfall
+        rng.integers(-20, 51, distinct) * 1.0,  # temperature
+        rng.integers(0, 21, distinct) * 0.5,    # seismic_activity
+        rng.integers(0, 21, distinct) * 5.0     # wind_speed
+    ])
+    requests = pool[rng.integers(0, distinct, n_requests)]
+
+    results = {}
+    for label, cache in (('uncached', PredictionCache(maxsize=0)), ('cached', PredictionCache())):
+        server = ModelServer(cache=cache)
+        columns = server.predictor.feature_columns
+        frames = [pd.DataFrame([row], columns=columns) for row in requests]
+        start = time.perf_counter()
+        for frame in frames:
+            server.predict(frame)
+        elapsed = time.perf_counter() - start
+        results[label] = {
+            'requests_per_second': len(frames) / elapsed,
+            'hit_rate': cache.stats()['hit_rate']
+        }
+    return results
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,32 @@
+import logging
+import multiprocessing
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_preload = []  # Modules requested for the shared forkserver so far
+
+def mp_context(preload=()):
+    """Multiprocessing context for the process pools in this package
+
+    fork would copy locks held by the host's other threads (Flask's
+    threaded server, Streamlit, the SMS dispatcher) into a child that can
+    never release them. forkserver forks workers from a clean
+    single-threaded server; jobs are module-level functions or methods the
+    workers import. Workers re-import the host's __main__ as __mp_main__,
+    so entry scripts must not start services on import (see app.py).
+
+    preload lists modules the server imports once so workers start with
+    them loaded. There is one forkserver per process, started by the first
+    pool that uses it, so requests are merged and only those made before
+    it starts take effect. Falls back to spawn where forkserver is missing.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    added = [module for module in preload if module not in _preload]
+    if added:
+        _preload.extend(added)
+        context.set_forkserver_preload(list(_preload))
+    return context
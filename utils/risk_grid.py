@@ -0,0 +1,157 @@
+import itertools
+import json
+import logging
+import os
+import time
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Input ranges accepted by the predictions form
+DEFAULT_BOUNDS = {
+    'rainfall': (0.0, 500.0),
+    'temperature': (-20.0, 50.0),
+    'seismic_activity': (0.0, 10.0),
+    'wind_speed': (0.0, 100.0)
+}
+DEFAULT_SHAPE = {'rainfall': 26, 'temperature': 15, 'seismic_activity': 21, 'wind_speed': 21}
+
+class RiskGrid:
+    """Class probabilities precomputed on a regular 4-D feature grid
+
+    The table holds the forest's output at every grid point (float32,
+    shape grid + (n_classes,)). A lookup finds the enclosing cell and
+    blends its 16 corners multilinearly, so the cost per reading is
+    constant whatever the forest size. Readings outside the bounds are
+    reported by in_bounds so the caller can fall back to the forest.
+    """
+
+    def __init__(self, table, lower, upper, model_key=None, deviation=None):
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.shape = np.array(self.table.shape[:-1], dtype=np.int64)
+        self.n_classes = self.table.shape[-1]
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.step = (self.upper - self.lower) / (self.shape - 1)
+        self.model_key = model_key
+        self.deviation = deviation
+
+        # Row-major strides into the flattened (points, classes) table
+        self._flat = self.table.reshape(-1, self.n_classes)
+        self._strides = np.cumprod(np.append(self.shape[1:], 1)[::-1])[::-1]
+        self._corners = np.array(list(itertools.product((0, 1), repeat=len(self.shape))), dtype=np.int64)
+
+    @classmethod
+    def build(cls, predictor, bounds=None, shape=None, batch_rows=65536, check_samples=20000):
+        """Evaluate the predictor's forest on every grid point
+
+        bounds and shape map feature name to (low, high) and point count;
+        missing entries use DEFAULT_BOUNDS / DEFAULT_SHAPE. The grid is then
+        checked against the exact forest on check_samples random readings.
+        """
+        start = time.perf_counter()
+        bounds = {**DEFAULT_BOUNDS, **(bounds or {})}
+        shape = {**DEFAULT_SHAPE, **(shape or {})}
+        columns = predictor.feature_columns
+        axes = [np.linspace(*bounds[col], shape[col]) for col in columns]
+        grid_shape = tuple(len(axis) for axis in axes)
+
+        n_points = int(np.prod(grid_shape))
+        table = np.empty((n_points, len(predictor.disaster_types)), dtype=np.float32)
+        for begin in range(0, n_points, batch_rows):
+            index = np.unravel_index(np.arange(begin, min(begin + batch_rows, n_points)), grid_shape)
+            points = np.column_stack([axis[i] for axis, i in zip(axes, index)])
+            table[begin:begin + len(points)] = predictor.model.predict_proba(predictor.preprocess_data(points))
+
+        grid = cls(table.reshape(grid_shape + (table.shape[1],)),
+                   [bounds[col][0] for col in columns], [bounds[col][1] for col in columns],
+                   model_key=predictor.model_key)
+        build_seconds = time.perf_counter() - start
+        grid.deviation = grid.compare(predictor, n_samples=check_samples)
+        grid.deviation['build_seconds'] = build_seconds
+        logger.info(f"Built {grid_shape} risk grid ({grid.table.nbytes / 1e6:.1f} MB) in {build_seconds:.1f}s, "
+                    f"max deviation {grid.deviation['max_abs_diff']:.3f}")
+        return grid
+
+    def in_bounds(self, X):
+        """Mask of readings inside the grid"""
+        X = np.asarray(X, dtype=np.float64)
+        return np.all((X >= self.lower) & (X <= self.upper), axis=1)
+
+    def predict_proba(self, X):
+        """Interpolated class probabilities for raw (N, 4) readings (clamped to the bounds)"""
+        X = np.asarray(X, dtype=np.float64)
+        position = np.clip((X - self.lower) / self.step, 0, self.shape - 1)
+        base = np.minimum(position.astype(np.int64), self.shape - 2)
+        frac = position - base
+
+        probabilities = np.zeros((len(X), self.n_classes), dtype=np.float64)
+        base_flat = base @ self._strides
+        for corner in self._corners:
+            weight = np.prod(np.where(corner, frac, 1.0 - frac), axis=1)
+            probabilities += weight[:, None] * self._flat[base_flat + corner @ self._strides]
+        return probabilities
+
+    def compare(self, predictor, n_samples=20000, seed=42):
+        """Deviation of the grid from the exact forest on random in-bounds readings"""
+        rng = np.random.default_rng(seed)
+        X = rng.uniform(self.lower, self.upper, size=(n_samples, len(self.lower)))
+        exact = predictor.model.predict_proba(predictor.preprocess_data(X))
+        approx = self.predict_proba(X)
+        diff = np.abs(exact - approx)
+        return {
+            'samples': n_samples,
+            'max_abs_diff': float(diff.max()),
+            'mean_abs_diff': float(diff.mean()),
+            'p99_abs_diff': float(np.percentile(diff.max(axis=1), 99)),
+            'label_agreement': float((exact.argmax(axis=1) == approx.argmax(axis=1)).mean())
+        }
+
+    def save(self, path):
+        """Write the grid to an .npz file (atomically)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, table=self.table, lower=self.lower, upper=self.upper,
+                 model_key=np.array(self.model_key or ''), deviation=np.array(json.dumps(self.deviation)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['table'], data['lower'], data['upper'],
+                       model_key=str(data['model_key']) or None,
+                       deviation=json.loads(str(data['deviation'])))
+
+    def __getstate__(self):
+        # Only the table and bounds; derived views are rebuilt on unpickling
+        return {'table': self.table, 'lower': self.lower, 'upper': self.upper,
+                'model_key': self.model_key, 'deviation': self.deviation}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+def benchmark(shape=None, n_rows=(1, 100, 10000)):
+    """Grid lookup versus the forest for a few batch sizes, plus the grid's deviation"""
+    from utils.ml_predictor import DisasterPredictor
+
+    predictor = DisasterPredictor()
+    grid = RiskGrid.build(predictor, shape=shape)
+    rng = np.random.default_rng(0)
+
+    timings = {}
+    for n in n_rows:
+        X = rng.uniform(grid.lower, grid.upper, size=(n, len(grid.lower)))
+        start = time.perf_counter()
+        predictor.model.predict_proba(predictor.preprocess_data(X))
+        forest_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        grid.predict_proba(X)
+        grid_seconds = time.perf_counter() - start
+        timings[n] = {'forest_ms': forest_seconds * 1000, 'grid_ms': grid_seconds * 1000}
+
+    return {'grid_shape': grid.table.shape, 'megabytes': grid.table.nbytes / 1e6,
+            'deviation': grid.deviation, 'timings': timings}
+
+if __name__ == "__main__":
+    print(benchmark())
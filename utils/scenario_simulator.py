@@ -0,0 +1,204 @@
+import logging
+import os
+import time
+from functools import partial
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from utils.data_generator import CITIES, SEVERITIES, generate_resource_data
+from utils.process_context import mp_context
+from utils.resource_optimizer import ResourceOptimizer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ScenarioSimulator:
+    """Monte Carlo stress test of one inventory against many alert scenarios
+
+    Each scenario samples a number of concurrent alerts, and for every
+    alert a location, severity, population and a response-rate trajectory
+    (a logistic rise to a final rate over `steps` time steps). The
+    allocator runs at every step, and the scenario records the peak
+    shortage per resource (needs minus allocation, summed over alerts),
+    the share of alerts left short and the unmet need per location.
+    Scenarios run in batches on a process pool; every scenario has its
+    own seed, so results do not depend on the number of workers.
+
+    The defaults model the dashboard's scale: up to a few dozen alerts of
+    some tens of people each, against one generated inventory, which puts
+    that inventory near its shortage threshold. stock_multiplier scales
+    the inventory (e.g. 2 for twice the stock) to test other levels,
+    run(n_alerts=...) tests other loads such as thousands of concurrent
+    alerts, and run() reports the multiplier each resource needs to stay
+    under a target shortage probability.
+    """
+
+    def __init__(
+        self,
+        available_resources=None,
+        method='proportional',
+        locations=None,
+        n_alerts=(1, 30),
+        steps=12,
+        severity_probs=(0.2, 0.3, 0.5),
+        population_median=30,
+        population_sigma=1.0,
+        stock_multiplier=1.0
+    ):
+        if method not in ('proportional', 'priority'):
+            raise ValueError(f"Scenario simulation supports 'proportional' and 'priority', not {method}")
+        self.optimizer = ResourceOptimizer()
+        self.available_resources = available_resources or generate_resource_data(seed=42)
+        self.method = method
+        self.locations = list(locations or CITIES)
+        self.n_alerts = n_alerts
+        self.steps = steps
+        self.severity_probs = np.asarray(severity_probs, dtype=np.float64)
+        self.population_median = population_median
+        self.population_sigma = population_sigma
+        self.stock_multiplier = stock_multiplier
+
+        # Resource order of the allocation problem
+        _, self.resource_names, _, stock, _ = self.optimizer.allocation_problem(self.available_resources, {}, {})
+        self.stock = np.floor(stock * stock_multiplier).astype(np.int64)
+
+    def sample(self, rng, n_alerts=None):
+        """Draw one scenario: location codes, severity labels, populations and (steps, alerts) response rates"""
+        low, high = _alert_range(n_alerts or self.n_alerts)
+        n = int(rng.integers(low, high + 1))
+        locations = rng.integers(0, len(self.locations), n)
+        severities = np.array(SEVERITIES, dtype=object)[rng.choice(len(SEVERITIES), n, p=self.severity_probs)]
+        populations = np.maximum(1, rng.lognormal(np.log(self.population_median), self.population_sigma, n)).astype(np.int64)
+
+        # Logistic rise from zero towards each alert's final response rate
+        final = rng.beta(4, 2, n)
+        speed = rng.uniform(0.3, 1.5, n)
+        midpoint = rng.uniform(0.2, 0.7, n) * self.steps
+        t = np.arange(self.steps, dtype=np.float64)[:, None]
+        curve = 1 / (1 + np.exp(-speed * (t - midpoint)))
+        start = 1 / (1 + np.exp(speed * midpoint))
+        response = final * (curve - start) / (1 - start)
+        return locations, severities, populations, response
+
+    def run_scenario(self, rng, n_alerts=None):
+        """Allocate at every step of one sampled scenario; returns the peak shortages"""
+        locations, severities, populations, response = self.sample(rng, n_alerts)
+        n = len(populations)
+        weights = np.array([self.optimizer.priority_weights[s] for s in severities], dtype=np.float64)
+
+        # Needs for every (step, alert) in one call
+        needs = self.optimizer.needs_matrix(np.tile(populations, self.steps), np.tile(severities, self.steps),
+                                            response.ravel()).reshape(self.steps, n, -1)
+        priority = weights * populations * (1 - response)
+
+        unmet = np.empty_like(needs)
+        for step in range(self.steps):
+            unmet[step] = needs[step] - self.optimizer.allocate(needs[step], self.stock, priority[step], method=self.method)
+        shortage = unmet.sum(axis=1)
+        short_alerts = (unmet > 0).mean(axis=1)
+
+        # Where the need went unmet at the worst step
+        peak_need = needs.sum(axis=1).max(axis=0)
+        peak = int(shortage.sum(axis=1).argmax())
+        unmet_by_location = np.zeros((len(self.locations), len(self.stock)), dtype=np.int64)
+        np.add.at(unmet_by_location, locations, unmet[peak])
+        return {
+            'alerts': n,
+            'peak_step': peak,
+            'shortage': shortage.max(axis=0),
+            'peak_need': peak_need,
+            'shortage_share': shortage.max(axis=0) / np.maximum(1, peak_need),
+            'short_alerts': short_alerts.max(axis=0),
+            'unmet_by_location': unmet_by_location
+        }
+
+    def _run_batch(self, seeds, n_alerts=None):
+        results = [self.run_scenario(np.random.default_rng(seed), n_alerts) for seed in seeds]
+        return {key: np.array([result[key] for result in results]) for key in results[0]}
+
+    def run(self, n_scenarios=10000, seed=42, workers=None, batch_size=50, target_probability=0.05,
+            n_alerts=None):
+        """Run n_scenarios on a process pool and aggregate shortage distributions
+
+        n_alerts sets the concurrent-alert load for this run, as a fixed
+        count (e.g. 5000) or a (min, max) range sampled per scenario; it
+        defaults to the simulator's n_alerts, the dashboard-scale range
+        the default inventory is calibrated for. Allocation cost grows
+        with the load, so lower n_scenarios or batch_size for thousands of
+        alerts. workers defaults to the CPU count; workers=1 runs in this
+        process.
+        Returns per_resource and per_location DataFrames plus the raw
+        per-scenario arrays (shortage, shortage_share, short_alerts, alerts,
+        peak_step, peak_need). A resource runs short exactly when a
+        scenario's peak total need exceeds its stock, so per_resource also
+        gives the stock that keeps the shortage probability at or below
+        target_probability (required_stock) and its ratio to the base
+        inventory (required_multiplier, comparable to stock_multiplier).
+        """
+        start = time.perf_counter()
+        seeds = np.random.SeedSequence(seed).spawn(n_scenarios)
+        batches = [seeds[i:i + batch_size] for i in range(0, n_scenarios, batch_size)]
+        workers = workers or os.cpu_count() or 1
+
+        run_batch = partial(self._run_batch, n_alerts=n_alerts)
+        if workers == 1:
+            parts = [run_batch(batch) for batch in batches]
+        else:
+            # Workers only need the allocator, not the ML stack
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context(['utils.scenario_simulator'])) as executor:
+                parts = list(executor.map(run_batch, batches))
+        results = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+        shortage = results['shortage']
+        required_stock = np.ceil(np.quantile(results['peak_need'], 1 - target_probability, axis=0)).astype(np.int64)
+        base_stock = self.stock / self.stock_multiplier if self.stock_multiplier else np.zeros(len(self.stock))
+        per_resource = pd.DataFrame({
+            'available': self.stock,
+            'shortage_probability': (shortage > 0).mean(axis=0),
+            'mean_shortage': shortage.mean(axis=0),
+            'p50_shortage': np.percentile(shortage, 50, axis=0),
+            'p90_shortage': np.percentile(shortage, 90, axis=0),
+            'p99_shortage': np.percentile(shortage, 99, axis=0),
+            'max_shortage': shortage.max(axis=0),
+            'mean_shortage_share': results['shortage_share'].mean(axis=0),
+            'mean_short_alerts': results['short_alerts'].mean(axis=0),
+            'required_stock': required_stock,
+            'required_multiplier': np.divide(required_stock, base_stock, out=np.full(len(self.stock), np.inf),
+                                             where=base_stock > 0)
+        }, index=pd.Index(self.resource_names, name='resource'))
+        per_location = pd.DataFrame(results['unmet_by_location'].mean(axis=0), columns=self.resource_names,
+                                    index=pd.Index(self.locations, name='location'))
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Simulated {n_scenarios} scenarios of {_alert_range(n_alerts or self.n_alerts)} alerts "
+                    f"on {workers} workers in {elapsed:.1f}s")
+        return {
+            'scenarios': n_scenarios,
+            'seconds': elapsed,
+            'scenarios_per_second': n_scenarios / elapsed,
+            'per_resource': per_resource,
+            'per_location': per_location,
+            'shortage': shortage,
+            'shortage_share': results['shortage_share'],
+            'short_alerts': results['short_alerts'],
+            'alerts': results['alerts'],
+            'peak_step': results['peak_step'],
+            'peak_need': results['peak_need']
+        }
+
+def _alert_range(n_alerts):
+    """(min, max) concurrent alerts from a count or a range"""
+    if np.isscalar(n_alerts):
+        return int(n_alerts), int(n_alerts)
+    low, high = n_alerts
+    return int(low), int(high)
+
+if __name__ == "__main__":
+    summary = ScenarioSimulator().run()
+    print(f"{summary['scenarios']} scenarios in {summary['seconds']:.1f}s "
+          f"({summary['scenarios_per_second']:.0f}/s)")
+    print(summary['per_resource'].to_string())
+    print("Stock multiplier for at most a 5% shortage probability:")
+    print(summary['per_resource']['required_multiplier'].round(2).to_string())
+    print(summary['per_location'].round(0).to_string())
@@ -0,0 +1,350 @@
+import heapq
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.message_ids import new_message_id
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FakeGateway:
+    """Local stand-in for the SMS gateway with injectable latency and failures"""
+
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.sent = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send_alert(self, to_number, message, alert_id=None):
+        """Mimic SMSHandler.send_alert: return a gateway message ID or None"""
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failed = self._rng.random() < self.failure_rate
+        time.sleep(delay)
+        if failed:
+            return None
+        with self._lock:
+            self.sent += 1
+            return f"FAKE_{self.sent}"
+
+class MockGatewayServer:
+    """Local HTTP endpoint that accepts multi-recipient SMS payloads
+
+    Expects a JSON POST of {"to": [...], "message": ..., "alert_id": ...} and
+    replies with {"results": [{"to": ..., "message_id": ...}, ...]}, after an
+    optional injected latency per request.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, max_recipients=1000):
+        counter = itertools.count(1)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive so clients can reuse connections
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                recipients = payload.get('to', [])
+                if len(recipients) > max_recipients:
+                    self._reply(413, {'error': f"At most {max_recipients} recipients per request"})
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                server.requests += 1
+                self._reply(200, {'results': [
+                    {'to': number, 'message_id': f"MOCK_{next(counter)}"} for number in recipients
+                ]})
+
+            def _reply(self, code, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.latency = latency
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/send"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+class SMSDispatcher:
+    """Background SMS fan-out with a bounded queue and a worker pool
+
+    Messages are accepted immediately and given a dispatcher message ID.
+    Workers call send_fn(to_number, message, alert_id), which must return a
+    gateway message ID on success and None (or raise) on failure. Failed
+    sends are retried with exponential backoff up to max_attempts; waiting
+    retries sit on a timer heap served by a scheduler thread, so a failing
+    gateway never parks the workers themselves.
+    """
+
+    def __init__(self, send_fn, workers=4, queue_size=10000, max_attempts=3,
+                 backoff_base=0.5, backoff_max=30.0, max_tracked=100000):
+        self.send_fn = send_fn
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_tracked = max_tracked
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._status = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = False
+        self._stopping = threading.Event()
+
+        # Retries waiting for their backoff: heap of (due, sequence, item)
+        self._retries = []
+        self._retry_sequence = itertools.count()
+        self._retry_ready = threading.Condition()
+
+        # Messages accepted but not yet delivered or failed, for join()
+        self._unfinished = 0
+        self._finished = threading.Condition()
+
+    def start(self):
+        """Start the worker threads and the retry scheduler"""
+        if self._running:
+            return self
+        self._running = True
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"sms-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        scheduler = threading.Thread(target=self._scheduler, name="sms-retry-scheduler", daemon=True)
+        scheduler.start()
+        self._threads.append(scheduler)
+        logger.info(f"SMS dispatcher started with {self.workers} workers")
+        return self
+
+    def stop(self, timeout=None):
+        """Let the workers drain the queue and exit
+
+        Retries still waiting for their backoff are marked failed.
+        """
+        if not self._running:
+            return
+        self._stopping.set()
+        with self._retry_ready:
+            self._retry_ready.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._running = False
+
+        with self._retry_ready:
+            abandoned, self._retries = self._retries, []
+        for _, _, (message_id, *_rest) in abandoned:
+            self._finish(message_id, status='failed', error='dispatcher stopped before retry')
+        logger.info("SMS dispatcher stopped")
+
+    def enqueue(self, to_number, message, alert_id=None, block=False, timeout=None):
+        """Queue one SMS and return its message ID
+
+        Raises queue.Full when the queue is at capacity and block is False.
+        """
+        message_id = new_message_id()
+        self._track(message_id, {
+            'message_id': message_id,
+            'to_number': to_number,
+            'alert_id': alert_id,
+            'status': 'queued',
+            'attempts': 0,
+            'gateway_id': None,
+            'error': None,
+            'queued_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        })
+        with self._finished:
+            self._unfinished += 1
+        try:
+            self._queue.put((message_id, to_number, message, alert_id, 1), block=block, timeout=timeout)
+        except queue.Full:
+            self._finish(message_id, status='rejected', error='queue full')
+            raise
+        return message_id
+
+    def enqueue_many(self, numbers, message, alert_id=None):
+        """Queue the same message for many numbers; rejected entries get None"""
+        message_ids = []
+        for number in numbers:
+            try:
+                message_ids.append(self.enqueue(number, message, alert_id))
+            except queue.Full:
+                logger.error(f"SMS queue full, dropping message to {number}")
+                message_ids.append(None)
+        return message_ids
+
+    def get_status(self, message_id):
+        """Return a copy of the delivery record for a message ID"""
+        with self._lock:
+            record = self._status.get(message_id)
+            return dict(record) if record else None
+
+    def stats(self):
+        """Counts of tracked messages by status plus the queue and retry depths"""
+        with self._lock:
+            counts = {}
+            for record in self._status.values():
+                counts[record['status']] = counts.get(record['status'], 0) + 1
+        counts['queue_depth'] = self._queue.qsize()
+        with self._retry_ready:
+            counts['retry_depth'] = len(self._retries)
+        return counts
+
+    def join(self, timeout=None):
+        """Block until every accepted message is delivered or failed; False on timeout"""
+        with self._finished:
+            return self._finished.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def _track(self, message_id, record):
+        with self._lock:
+            self._status[message_id] = record
+            while len(self._status) > self.max_tracked:
+                self._status.popitem(last=False)
+
+    def _update(self, message_id, **fields):
+        with self._lock:
+            record = self._status.get(message_id)
+            if record is not None:
+                record.update(fields, updated_at=datetime.now().isoformat())
+
+    def _finish(self, message_id, **fields):
+        self._update(message_id, **fields)
+        with self._finished:
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._finished.notify_all()
+
+    def _worker(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            try:
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
+
+    def _scheduler(self):
+        """Move retries whose backoff has elapsed back onto the queue"""
+        while True:
+            with self._retry_ready:
+                while not self._stopping.is_set() and (
+                        not self._retries or self._retries[0][0] > time.monotonic()):
+                    wait = self._retries[0][0] - time.monotonic() if self._retries else None
+                    self._retry_ready.wait(wait)
+                if self._stopping.is_set():
+                    return
+                _, _, item = heapq.heappop(self._retries)
+            # Blocks while the queue is full; the workers keep draining it
+            while not self._stopping.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                self._finish(item[0], status='failed', error='dispatcher stopped before retry')
+
+    def _deliver(self, message_id, to_number, message, alert_id, attempt):
+        self._update(message_id, status='sending', attempts=attempt)
+        try:
+            gateway_id = self.send_fn(to_number, message, alert_id)
+            error = None if gateway_id else 'gateway returned no message ID'
+        except Exception as e:
+            gateway_id, error = None, str(e)
+
+        if gateway_id:
+            self._finish(message_id, status='delivered', gateway_id=gateway_id, error=None)
+        elif attempt < self.max_attempts:
+            delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+            self._update(message_id, status='retrying', error=error)
+            logger.warning(f"SMS {message_id} to {to_number} failed ({error}), retrying in {delay:.2f}s")
+            with self._retry_ready:
+                heapq.heappush(self._retries, (time.monotonic() + delay, next(self._retry_sequence),
+                                               (message_id, to_number, message, alert_id, attempt + 1)))
+                self._retry_ready.notify()
+        else:
+            self._finish(message_id, status='failed', error=error)
+            logger.error(f"SMS {message_id} to {to_number} failed after {attempt} attempts: {error}")
+
+def load_test(n_messages=1000, workers=32, latency=0.05, failure_rate=0.05):
+    """Push n_messages through a dispatcher backed by FakeGateway"""
+    gateway = FakeGateway(latency=latency, failure_rate=failure_rate, seed=42)
+    dispatcher = SMSDispatcher(gateway.send_alert, workers=workers,
+                               queue_size=n_messages, backoff_base=0.01).start()
+
+    start = time.perf_counter()
+    dispatcher.enqueue_many([f"+91{i:010d}" for i in range(n_messages)], "Load test alert", "LOADTEST")
+    enqueue_time = time.perf_counter() - start
+    dispatcher.join()
+    total_time = time.perf_counter() - start
+    dispatcher.stop()
+
+    return {
+        'messages': n_messages,
+        'enqueue_seconds': enqueue_time,
+        'total_seconds': total_time,
+        'messages_per_second': n_messages / total_time,
+        'statuses': dispatcher.stats()
+    }
+
+def bulk_load_test(n_recipients=100000, batch_size=500, rate_limit=None, latency=0.01):
+    """Send one alert to n_recipients via SMSHandler.send_bulk against MockGatewayServer"""
+    from utils.sms_handler import SMSHandler
+
+    server = MockGatewayServer(latency=latency).start()
+    handler = SMSHandler(base_url=server.url, batch_size=batch_size, rate_limit=rate_limit)
+
+    start = time.perf_counter()
+    results = handler.send_bulk([f"+91{i:010d}" for i in range(n_recipients)], "Load test alert", "LOADTEST")
+    elapsed = time.perf_counter() - start
+    server.stop()
+
+    return {
+        'recipients': n_recipients,
+        'delivered': sum(result['success'] for result in results),
+        'gateway_requests': server.requests,
+        'total_seconds': elapsed,
+        'messages_per_second': n_recipients / elapsed
+    }
+
+if __name__ == "__main__":
+    print(load_test())
+    print(bulk_load_test())
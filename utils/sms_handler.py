@@ -1,21 +1,118 @@
+import json
 import logging
+import os
+import re
+import threading
+import time
 import requests
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from utils.alert_store import AlertStore
+from utils.confirmations import phone_key
+from utils.message_ids import new_message_id
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Reply matchers, compiled once. A reply confirms safety when a line starts
+# with YES (or Y / SAFE / OK) and nothing in the reply negates it or asks for
+# help ("Ok but I need help", "Safe? no, trapped"); such replies are left
+# unconfirmed for follow-up. "Emergency" is not a distress word: replies often
+# quote the alert, which calls itself an EMERGENCY ALERT. The alert is taken
+# from a UUID anywhere in the body ("YES 1b4e...", "YES to 1b4e...",
+# "Alert ID: 1b4e...") or from an explicit "Alert ID:" label, and otherwise
+# from the last alert the store recorded as sent to that number.
+_UUID = r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+YES_PATTERN = re.compile(r'^\W*(?:yes|y|safe|ok)\b', re.IGNORECASE | re.MULTILINE)
+DISTRESS_PATTERN = re.compile(
+    r"\b(?:no|not|never|help|trapped|stuck|injured|hurt|bleeding|danger|sos|rescue|unsafe|"
+    r"cannot|can'?t|won'?t|isn'?t|ain'?t|nope)\b",
+    re.IGNORECASE
+)
+UUID_PATTERN = re.compile(r'\b(' + _UUID + r')\b')
+ALERT_ID_LABEL_PATTERN = re.compile(r'\balert\s*id\b\s*[:#]?\s*([\w-]+)', re.IGNORECASE)
+
+def parse_reply(message_body):
+    """Return (is_safe, alert_id or None) for an inbound SMS body"""
+    body = message_body or ''
+    is_safe = YES_PATTERN.search(body) is not None and DISTRESS_PATTERN.search(body) is None
+    match = UUID_PATTERN.search(body)
+    if match:
+        return is_safe, match.group(1).lower()
+    match = ALERT_ID_LABEL_PATTERN.search(body)
+    return is_safe, match.group(1) if match else None
+
+class TokenBucket:
+    """Thread-safe token bucket used to cap the outgoing message rate"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        """Block until n tokens have been taken
+
+        Requests larger than the bucket are charged in capacity-sized
+        slices, so a big batch still costs its full n tokens.
+        """
+        remaining = float(n)
+        while remaining > 0:
+            take = min(remaining, self.capacity)
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= take:
+                    self.tokens -= take
+                    remaining -= take
+                    continue
+                wait = (take - self.tokens) / self.rate
+            time.sleep(wait)
+
 class SMSHandler:
-    def __init__(self):
-        self.base_url = "https://api.globfone.com/send"  # Example URL, replace with actual Globfone API endpoint
+    def __init__(self, base_url=None, api_key=None, batch_size=100, rate_limit=None,
+                 max_connections=16, timeout=10, store=None):
+        # Without an explicit gateway URL the handler only simulates sending
+        self.simulate = base_url is None and 'SMS_GATEWAY_URL' not in os.environ
+        self.base_url = base_url or os.environ.get(
+            'SMS_GATEWAY_URL', "https://api.globfone.com/send"  # Example URL, replace with actual Globfone API endpoint
+        )
+        self.api_key = api_key or os.environ.get('SMS_GATEWAY_API_KEY')
+        self.batch_size = batch_size  # Max recipients the gateway accepts per request
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        # Resolves bare "YES" replies to the last alert sent to that number; pass
+        # the shared store (get_store()) so this survives restarts and is seen by
+        # every process. Senders record recipients there when they create an alert.
+        self.store = store if store is not None else AlertStore()
+
+        # One pooled session shared by every send, so connections are reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if self.api_key:
+            self.session.headers['Authorization'] = f"Bearer {self.api_key}"
+
         logger.info("Initialized SMS Handler with Globfone integration")
 
+    def _new_message_id(self):
+        """Generate a unique, time-sortable message ID for a simulated send"""
+        return f"GLOB_{new_message_id()}"
+
     def send_alert(self, to_number, message, alert_id=None):
         """Send SMS alert using Globfone"""
         try:
             logger.info(f"Sending alert to {to_number}")
 
+            if not self.simulate:
+                return self.send_bulk([to_number], message, alert_id)[0]['message_id']
+
             # Add alert ID to message if provided
             if alert_id:
                 message = f"{message}\nAlert ID: {alert_id}"
@@ -30,7 +127,7 @@ class SMSHandler:
             logger.info(f"Message: {message}")
 
             # Return a mock message ID
-            message_id = f"GLOB_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            message_id = self._new_message_id()
             logger.info(f"Mock message ID generated: {message_id}")
 
             return message_id
@@ -39,39 +136,133 @@ class SMSHandler:
             logger.error(f"Error sending SMS to {to_number}: {str(e)}")
             return None
 
+    def send_bulk(self, numbers, message, alert_id=None):
+        """Send one message to many numbers
+
+        Recipients are grouped into gateway requests of up to batch_size
+        numbers and sent concurrently over the pooled session, subject to the
+        rate limit. Returns one result dict per recipient, in input order.
+        """
+        if alert_id:
+            message = f"{message}\nAlert ID: {alert_id}"
+
+        batches = [numbers[i:i + self.batch_size] for i in range(0, len(numbers), self.batch_size)]
+        logger.info(f"Sending bulk alert to {len(numbers)} recipients in {len(batches)} batches")
+
+        if len(batches) <= 1:
+            batch_results = [self._send_batch(batch, message, alert_id) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+                batch_results = list(executor.map(
+                    lambda batch: self._send_batch(batch, message, alert_id), batches
+                ))
+
+        results = [result for batch in batch_results for result in batch]
+        sent = sum(result['success'] for result in results)
+        logger.info(f"Bulk alert finished: {sent}/{len(results)} delivered to gateway")
+        return results
+
+    def _send_batch(self, numbers, message, alert_id):
+        """Send one multi-recipient request and map the reply to per-recipient results"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(len(numbers))
+
+        if self.simulate:
+            return [
+                {'to': number, 'success': True, 'message_id': self._new_message_id(), 'error': None}
+                for number in numbers
+            ]
+
+        try:
+            response = self.session.post(
+                self.base_url,
+                json={'to': list(numbers), 'message': message, 'alert_id': alert_id},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            message_ids = {
+                item.get('to'): item.get('message_id')
+                for item in response.json().get('results', [])
+            }
+            return [
+                {
+                    'to': number,
+                    'success': bool(message_ids.get(number)),
+                    'message_id': message_ids.get(number),
+                    'error': None if message_ids.get(number) else 'No message ID returned'
+                }
+                for number in numbers
+            ]
+        except Exception as e:
+            logger.error(f"Error sending SMS batch of {len(numbers)}: {str(e)}")
+            return [
+                {'to': number, 'success': False, 'message_id': None, 'error': str(e)}
+                for number in numbers
+            ]
+
     def process_response(self, from_number, message_body):
         """Process incoming SMS response"""
         try:
             logger.info(f"Processing response from {from_number}: {message_body}")
-
-            # Extract alert ID from message body if present
-            alert_id = None
-            message_lines = message_body.strip().split('\n')
-            for line in message_lines:
-                if line.startswith('Alert ID:'):
-                    alert_id = line.split(':')[1].strip()
-                    break
-
-            # Check if message indicates safety confirmation
-            is_safe = message_body.strip().upper() == 'YES'
-
-            if is_safe and alert_id:
-                logger.info(f"Safety confirmation received for alert {alert_id} from {from_number}")
-                return {
-                    'success': True,
-                    'alert_id': alert_id,
-                    'phone_number': from_number,
-                    'is_safe': True
-                }
-
-            return {
-                'success': False,
-                'error': 'Invalid response format'
-            }
+            result = self._resolve_reply(from_number, message_body)
+            if result['success']:
+                logger.info(f"Safety confirmation received for alert {result['alert_id']} from {from_number}")
+            return result
 
         except Exception as e:
             logger.error(f"Error processing SMS response: {str(e)}")
             return {
                 'success': False,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    def process_responses(self, messages):
+        """Process a stream of inbound replies
+
+        messages is any iterable of dicts with 'from' (or 'from_number') and
+        'body' (or 'message_body'), e.g. parsed webhook events. Yields one
+        result per message, in the same shape as process_response.
+        """
+        for message in messages:
+            try:
+                from_number = message.get('from') or message.get('from_number')
+                body = message.get('body') or message.get('message_body')
+                yield self._resolve_reply(from_number, body)
+            except Exception as e:
+                yield {'success': False, 'error': str(e)}
+
+    def process_jsonl(self, lines):
+        """Process replies from JSONL lines (for example a gateway webhook dump)"""
+        for line in lines:
+            try:
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8')
+                line = line.strip()
+                if not line:
+                    continue
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError(f"Expected a JSON object per line, got {type(message).__name__}")
+            except ValueError as e:  # Includes JSONDecodeError and UnicodeDecodeError
+                logger.warning(f"Skipping malformed JSONL reply: {str(e)}")
+                yield {'success': False, 'error': f"Malformed line: {str(e)}"}
+                continue
+            yield from self.process_responses([message])
+
+    def _resolve_reply(self, from_number, message_body):
+        is_safe, alert_id = parse_reply(message_body)
+        if not is_safe:
+            return {'success': False, 'phone_number': from_number, 'error': 'Not a safety confirmation'}
+
+        if alert_id is None:
+            phone = phone_key(from_number or '')
+            alert_id = self.store.last_alert_for(phone) if phone is not None else None
+        if alert_id is None:
+            return {'success': False, 'phone_number': from_number, 'error': 'No alert ID found for reply'}
+
+        return {
+            'success': True,
+            'alert_id': alert_id,
+            'phone_number': from_number,
+            'is_safe': True
+        }
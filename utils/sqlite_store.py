@@ -0,0 +1,337 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from utils.data_generator import generate_resource_data
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    message TEXT,
+    location TEXT,
+    severity TEXT,
+    timestamp TEXT NOT NULL,
+    disaster_type TEXT,
+    probability REAL,
+    recipients INTEGER NOT NULL DEFAULT 0,
+    confirmed_safe INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_location ON alerts (location, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_disaster_type ON alerts (disaster_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp);
+
+CREATE TABLE IF NOT EXISTS alert_totals (
+    singleton INTEGER PRIMARY KEY CHECK (singleton = 0),
+    alerts INTEGER NOT NULL DEFAULT 0,
+    total_sent INTEGER NOT NULL DEFAULT 0,
+    confirmed INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO alert_totals (singleton) VALUES (0);
+
+CREATE TRIGGER IF NOT EXISTS trg_alerts_insert AFTER INSERT ON alerts BEGIN
+    UPDATE alert_totals SET alerts = alerts + 1,
+                            total_sent = total_sent + NEW.recipients,
+                            confirmed = confirmed + NEW.confirmed_safe;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_alerts_confirm AFTER UPDATE OF confirmed_safe ON alerts BEGIN
+    UPDATE alert_totals SET confirmed = confirmed + NEW.confirmed_safe - OLD.confirmed_safe;
+END;
+
+-- One row per (alert, phone) so repeated confirmations are ignored
+CREATE TABLE IF NOT EXISTS confirmations (
+    alert_id TEXT NOT NULL,
+    phone INTEGER NOT NULL,
+    PRIMARY KEY (alert_id, phone)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_confirmations_insert AFTER INSERT ON confirmations BEGIN
+    UPDATE alerts SET confirmed_safe = confirmed_safe + 1 WHERE id = NEW.alert_id;
+END;
+
+-- Who each alert was sent to, in send order, to resolve replies without an alert ID
+CREATE TABLE IF NOT EXISTS alert_recipients (
+    alert_id TEXT NOT NULL,
+    phone INTEGER NOT NULL,
+    UNIQUE (alert_id, phone)
+);
+CREATE INDEX IF NOT EXISTS idx_alert_recipients_phone ON alert_recipients (phone);
+
+CREATE TABLE IF NOT EXISTS evacuations (
+    alert_id TEXT PRIMARY KEY,
+    location TEXT,
+    severity TEXT,
+    message TEXT,
+    timestamp TEXT,
+    total INTEGER NOT NULL DEFAULT 0,
+    confirmed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_evacuations_location ON evacuations (location);
+-- A de-duplicated safety confirmation also counts as a confirmed evacuation
+CREATE TRIGGER IF NOT EXISTS trg_confirmations_evacuation AFTER INSERT ON confirmations BEGIN
+    UPDATE evacuations SET confirmed = MIN(total, confirmed + 1) WHERE alert_id = NEW.alert_id;
+END;
+
+CREATE TABLE IF NOT EXISTS resources (
+    name TEXT PRIMARY KEY,
+    quantity INTEGER NOT NULL
+);
+"""
+
+# Statement text is kept constant so sqlite3's per-connection statement cache
+# reuses the compiled (prepared) statement on every call
+ALERT_COLUMNS = "id, message, location, severity, timestamp, disaster_type, probability, recipients, confirmed_safe"
+INSERT_ALERT = f"INSERT INTO alerts ({ALERT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+SELECT_ALERT = f"SELECT {ALERT_COLUMNS} FROM alerts WHERE id = ?"
+SELECT_ALL = f"SELECT {ALERT_COLUMNS} FROM alerts ORDER BY rowid"
+SELECT_BY_LOCATION = f"SELECT {ALERT_COLUMNS} FROM alerts WHERE location = ? ORDER BY timestamp"
+SELECT_BY_DISASTER_TYPE = f"SELECT {ALERT_COLUMNS} FROM alerts WHERE disaster_type = ? ORDER BY timestamp"
+SELECT_BETWEEN = f"SELECT {ALERT_COLUMNS} FROM alerts WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp"
+SELECT_RECENT = f"SELECT {ALERT_COLUMNS} FROM alerts ORDER BY timestamp DESC LIMIT ?"
+CONFIRM_ALERT = "UPDATE alerts SET confirmed_safe = confirmed_safe + ? WHERE id = ?"
+SELECT_TOTALS = "SELECT alerts, total_sent, confirmed FROM alert_totals WHERE singleton = 0"
+COUNT_ALERTS = "SELECT alerts FROM alert_totals WHERE singleton = 0"
+INSERT_CONFIRMATION = "INSERT OR IGNORE INTO confirmations (alert_id, phone) VALUES (?, ?)"
+# REPLACE gives a resent alert a new rowid, so it becomes the phone's latest again
+INSERT_RECIPIENT = "INSERT OR REPLACE INTO alert_recipients (alert_id, phone) VALUES (?, ?)"
+SELECT_LAST_ALERT = "SELECT alert_id FROM alert_recipients WHERE phone = ? ORDER BY rowid DESC LIMIT 1"
+
+UPSERT_EVACUATION = """
+INSERT INTO evacuations (alert_id, location, severity, message, timestamp, total, confirmed)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (alert_id) DO UPDATE SET total = excluded.total, confirmed = excluded.confirmed
+"""
+CONFIRM_EVACUATION = "UPDATE evacuations SET confirmed = MIN(total, confirmed + ?) WHERE alert_id = ?"
+SELECT_EVACUATIONS = "SELECT alert_id, location, severity, message, timestamp, total, confirmed FROM evacuations"
+
+SEED_RESOURCE = "INSERT OR IGNORE INTO resources (name, quantity) VALUES (?, ?)"
+SELECT_RESOURCES = "SELECT name, quantity FROM resources ORDER BY rowid"
+TAKE_RESOURCE = "UPDATE resources SET quantity = quantity - ? WHERE name = ? AND quantity >= ?"
+
+class SQLiteStore:
+    """SQLite-backed alert, evacuation and resource state shared across processes
+
+    Exposes the same alert interface as AlertStore. Each thread (and each
+    forked worker) opens its own connection; the database runs in WAL mode
+    so readers never block the single writer, and counters are updated
+    with atomic SQL increments and triggers rather than a Python lock.
+    """
+
+    def __init__(self, path='data/disaster_management.db', busy_timeout_ms=5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        logger.info(f"SQLite store ready at {path}")
+
+    def _connection(self):
+        """Per-thread connection, reopened after fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,  # Explicit BEGIN/COMMIT only
+                cached_statements=256,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, sql, params_seq):
+        """Run one statement for many parameter sets inside a single transaction"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.executemany(sql, params_seq)
+            conn.execute("COMMIT")
+            return cursor.rowcount
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _timestamp(value):
+        if value is None:
+            value = datetime.now()
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+        return value.isoformat(sep=' ')
+
+    @staticmethod
+    def _alert_from_row(row):
+        alert = dict(row)
+        alert['confirmation_stats'] = {
+            'total_sent': alert['recipients'],
+            'confirmed': alert['confirmed_safe'],
+            'pending': alert['recipients'] - alert['confirmed_safe']
+        }
+        return alert
+
+    def _query(self, sql, params=()):
+        return [self._alert_from_row(row) for row in self._connection().execute(sql, params)]
+
+    # Alerts
+
+    def __len__(self):
+        return self._connection().execute(COUNT_ALERTS).fetchone()[0]
+
+    def __contains__(self, alert_id):
+        return self.get(alert_id) is not None
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def add(self, alert):
+        """Insert an alert"""
+        self.add_many([alert])
+        return self.get(alert['id'])
+
+    def add_many(self, alerts):
+        """Insert many alerts in one transaction"""
+        try:
+            return self._write(INSERT_ALERT, [
+                (
+                    alert['id'], alert.get('message'), alert.get('location'), alert.get('severity'),
+                    self._timestamp(alert.get('timestamp')), alert.get('disaster_type'),
+                    alert.get('probability'), alert.get('recipients', 0), alert.get('confirmed_safe', 0)
+                )
+                for alert in alerts
+            ])
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Duplicate alert ID: {e}")
+
+    def get(self, alert_id):
+        """Look up an alert by ID, or None"""
+        row = self._connection().execute(SELECT_ALERT, (alert_id,)).fetchone()
+        return self._alert_from_row(row) if row else None
+
+    def all(self):
+        return self._query(SELECT_ALL)
+
+    def by_location(self, location):
+        return self._query(SELECT_BY_LOCATION, (location,))
+
+    def by_disaster_type(self, disaster_type):
+        return self._query(SELECT_BY_DISASTER_TYPE, (disaster_type,))
+
+    def between(self, start=None, end=None):
+        """Alerts with start <= timestamp <= end, oldest first"""
+        start = self._timestamp(start if start is not None else datetime.min)
+        end = self._timestamp(end if end is not None else datetime.max)
+        return self._query(SELECT_BETWEEN, (start, end))
+
+    def recent(self, limit=100):
+        """The newest alerts first"""
+        if limit <= 0:
+            return []  # SQLite treats a negative LIMIT as no limit
+        return self._query(SELECT_RECENT, (limit,))
+
+    def confirm(self, alert_id, count=1):
+        """Add confirmations to one alert and return the updated alert"""
+        if self._write(CONFIRM_ALERT, [(count, alert_id)]) == 0:
+            raise KeyError(f"Alert {alert_id} not found")
+        return self.get(alert_id)
+
+    def confirm_many(self, counts):
+        """Apply {alert_id: count} confirmations in a single transaction"""
+        if not counts:
+            return 0
+        return self._write(CONFIRM_ALERT, [(count, alert_id) for alert_id, count in counts.items()])
+
+    def confirm_unique(self, pairs):
+        """Record (alert_id, phone) confirmations, ignoring ones already seen
+
+        phone must be the integer form of the number. Returns how many pairs
+        were new; each new pair bumps its alert's count via a trigger.
+        """
+        if not pairs:
+            return 0
+        return self._write(INSERT_CONFIRMATION, pairs)
+
+    def record_recipients(self, alert_id, phones):
+        """Note that alert_id was sent to phones (integer phone numbers)"""
+        if not phones:
+            return 0
+        return self._write(INSERT_RECIPIENT, [(alert_id, phone) for phone in phones])
+
+    def last_alert_for(self, phone):
+        """ID of the latest alert sent to an integer phone number, or None"""
+        row = self._connection().execute(SELECT_LAST_ALERT, (phone,)).fetchone()
+        return row['alert_id'] if row else None
+
+    def totals(self):
+        """Overall alert, notification and confirmation counts"""
+        alerts, total_sent, confirmed = self._connection().execute(SELECT_TOTALS).fetchone()
+        return {
+            'alerts': alerts,
+            'total_sent': total_sent,
+            'confirmed': confirmed,
+            'pending': total_sent - confirmed
+        }
+
+    # Evacuations
+
+    def upsert_evacuation(self, alert_id, data):
+        """Start (or reset the counts of) evacuation tracking for an alert"""
+        self._write(UPSERT_EVACUATION, [(
+            alert_id, data.get('location'), data.get('severity'), data.get('message'),
+            self._timestamp(data.get('timestamp')), data.get('total', 0), data.get('confirmed', 0)
+        )])
+
+    def confirm_evacuations(self, counts):
+        """Apply {alert_id: count} evacuation confirmations in a single transaction
+
+        For confirmations without a phone number (e.g. counted on site);
+        SMS replies go through confirm_unique, which updates the
+        evacuation count itself. Counts are capped at the total.
+        """
+        if not counts:
+            return 0
+        return self._write(CONFIRM_EVACUATION, [(count, alert_id) for alert_id, count in counts.items()])
+
+    def evacuation_data(self):
+        """Evacuation tracking keyed by alert ID, as the pages expect"""
+        return {
+            row['alert_id']: {key: row[key] for key in row.keys() if key != 'alert_id'}
+            for row in self._connection().execute(SELECT_EVACUATIONS)
+        }
+
+    # Resources
+
+    def seed_resources(self, resources):
+        """Store initial inventory; existing quantities are kept"""
+        self._write(SEED_RESOURCE, list(resources.items()))
+
+    def resources(self):
+        return {row['name']: row['quantity'] for row in self._connection().execute(SELECT_RESOURCES)}
+
+    def take_resource(self, name, quantity):
+        """Atomically deduct inventory; returns False if there is not enough"""
+        return self._write(TAKE_RESOURCE, [(quantity, name, quantity)]) == 1
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide SQLiteStore at ALERT_DB_PATH, seeding the inventory on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = SQLiteStore(os.environ.get('ALERT_DB_PATH', 'data/disaster_management.db'))
+                store.seed_resources(generate_resource_data())
+                _store = store
+    return _store
@@ -0,0 +1,99 @@
+import hashlib
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from utils.columnar import write_columnar
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = ['rainfall', 'temperature', 'seismic_activity', 'wind_speed']
+DISASTER_TYPES = ['flood', 'earthquake', 'cyclone', 'landslide']
+
+# Uniform (low, high) per disaster type, in DISASTER_TYPES x FEATURE_COLUMNS order
+CONDITIONS = np.array([
+    [(300, 500), (20, 30), (0, 3), (0, 30)],     # Flood: heavy rainfall
+    [(0, 100), (15, 35), (7, 10), (0, 30)],      # Earthquake: high seismic activity
+    [(100, 200), (25, 35), (0, 3), (80, 120)],   # Cyclone: high wind speed
+    [(200, 300), (20, 30), (4, 6), (0, 30)]      # Landslide: rainfall plus seismic
+], dtype=np.float64)
+NOISE_STD = np.array([5.0, 2.0, 0.3, 3.0])
+CLIP_LOW = np.array([0.0, -20.0, 0.0, 0.0])
+CLIP_HIGH = np.array([500.0, 50.0, 10.0, 120.0])
+
+def generate_samples(n_per_class, seed=42, noise=True, shuffle=False, dtype=np.float64, rng=None):
+    """Draw n_per_class labeled readings for every disaster type
+
+    Returns an (n_per_class * 4, 4) feature matrix in FEATURE_COLUMNS order
+    and int32 labels (indexes into DISASTER_TYPES). Rows are grouped by
+    class unless shuffle is set. With noise, Gaussian jitter is added and
+    values are clipped to realistic ranges, as in the training CSV.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    labels = np.repeat(np.arange(len(DISASTER_TYPES), dtype=np.int32), n_per_class)
+    if shuffle:
+        rng.shuffle(labels)
+
+    bounds = CONDITIONS[labels]
+    X = rng.uniform(bounds[:, :, 0], bounds[:, :, 1])
+    if noise:
+        X += rng.normal(0.0, NOISE_STD, size=X.shape)
+        np.clip(X, CLIP_LOW, CLIP_HIGH, out=X)
+    return X.astype(dtype, copy=False), labels
+
+def iter_chunks(n_per_class, chunk_rows=1000000, seed=42, noise=True, dtype=np.float32):
+    """Yield shuffled DataFrame chunks totalling exactly n_per_class rows per type
+
+    Each chunk holds an equal share of every class, so any prefix of the
+    stream is balanced; memory is bounded by chunk_rows.
+    """
+    rng = np.random.default_rng(seed)
+    per_chunk = max(1, chunk_rows // len(DISASTER_TYPES))
+    for begin in range(0, n_per_class, per_chunk):
+        n = min(per_chunk, n_per_class - begin)
+        X, y = generate_samples(n, noise=noise, shuffle=True, dtype=dtype, rng=rng)
+        chunk = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+        chunk['disaster_type'] = y
+        yield chunk
+
+def write_dataset(path, n_per_class, fmt='csv', chunk_rows=1000000, seed=42, noise=True,
+                  float_format='%.6f'):
+    """Stream a synthetic dataset to a CSV file or a columnar directory
+
+    fmt='csv' appends chunk by chunk to a temporary file that is renamed
+    into place; fmt='columnar' writes the utils.columnar format that
+    DisasterPredictor.train_large can memory-map. Returns a summary.
+    """
+    start = time.perf_counter()
+    rows = n_per_class * len(DISASTER_TYPES)
+    chunks = iter_chunks(n_per_class, chunk_rows=chunk_rows, seed=seed, noise=noise)
+
+    if fmt == 'csv':
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=(i == 0), index=False, float_format=float_format)
+        os.replace(tmp_path, path)
+    elif fmt == 'columnar':
+        digest = hashlib.sha256()
+        schema = {col: 'float32' for col in FEATURE_COLUMNS}
+        schema['disaster_type'] = 'int32'
+        source = {'path': None, 'generator': {'n_per_class': n_per_class, 'seed': seed, 'noise': noise}}
+
+        def hashed(chunks):
+            for chunk in chunks:
+                digest.update(chunk.to_numpy(dtype=np.float32).tobytes())
+                yield chunk
+            # Runs once every chunk is written, before the manifest is saved
+            source['sha256'] = digest.hexdigest()
+
+        write_columnar(path, schema, rows, hashed(chunks), source)
+    else:
+        raise ValueError(f"Unknown format {fmt}, expected 'csv' or 'columnar'")
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Wrote {rows} synthetic rows to {path} in {elapsed:.1f}s")
+    return {'path': path, 'rows': rows, 'format': fmt, 'seconds': elapsed, 'rows_per_second': rows / elapsed}